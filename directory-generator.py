@@ -1,202 +1,279 @@
-# ----------------------------------------------
-# Script by Ujwol
-# This script is designed to analyze and visualize a directory structure, 
-# log it to a file, and optionally generate a new file called `project_generator.py`. 
-# Additionally, multithreading is utilized to efficiently perform operations.
-#
-# - The script can be run normally or with the argument `-make_project=True` to generate a new script
-# - The script will create a new file `project_generator.py` with the functionality to build a project
-# - Multithreading ensures the project build process runs faster and with minimal blocking
-#
-# Usage:
-# python directory-generator.py
-# or 
-# python directory-generator.py -make_project=True
-# ----------------------------------------------
-
-import os
-import sys
-import logging
-import pyperclip
-import argparse
-from functools import lru_cache
-from threading import Thread
-from time import sleep
-
-# -------------------- Configuration --------------------
-MAX_DEPTH = 3
-EXCLUSIONS = {
-    'files': [os.path.basename(__file__), 'directory-setup.log', 'directory-generator.log'],
-    'dirs': ['.git', '__pycache__', 'node_modules', 'venv', '.venv', 'env', '.idea'],
-    'patterns': ['.', '~', '$']
-}
-LOG_CONFIG = {
-    'filename': 'directory-setup.log',
-    'level': logging.INFO,
-    'format': '%(asctime)s - %(levelname)s - %(message)s',
-    'datefmt': '%Y-%m-%d %H:%M:%S'
-}
-# -------------------------------------------------------
-
-class DirectoryObserver:
-    """Observer pattern for logging events"""
-    @staticmethod
-    def log_event(event_type, message):
-        logging.log(event_type, message)
-
-class ExclusionStrategy:
-    """Base exclusion logic with caching"""
-    @staticmethod
-    @lru_cache(maxsize=2048)
-    def should_exclude(path: str, is_dir: bool = False) -> bool:
-        base_name = os.path.basename(path)
-        if is_dir:
-            return any(
-                base_name == excl or
-                base_name.startswith(tuple(EXCLUSIONS['patterns']))
-                for excl in EXCLUSIONS['dirs']
-            )
-        return any(
-            base_name == excl or
-            base_name.endswith('.log') or
-            base_name.startswith(tuple(EXCLUSIONS['patterns']))
-            for excl in EXCLUSIONS['files']
-        )
-
-class EnhancedExclusionStrategy(ExclusionStrategy):
-    """Enhanced exclusion logic with full path checks"""
-    @staticmethod
-    @lru_cache(maxsize=2048)
-    def should_exclude(path: str, is_dir: bool = False) -> bool:
-        full_path = os.path.abspath(path)
-        if any(full_path.endswith(excl) for excl in ['Thumbs.db', '.DS_Store']):
-            return True
-        return ExclusionStrategy.should_exclude(path, is_dir)
-
-class SequentialDirectoryFormatter:
-    """Class to handle the directory structure generation"""
-    def __init__(self, root_path: str):
-        self.root_path = root_path
-
-    def generate_structure(self, current_path: str = None, depth: int = 0) -> str:
-        if current_path is None:
-            current_path = self.root_path
-        if depth >= MAX_DEPTH:
-            return ""
-
-        structure = []
-        try:
-            for item in os.listdir(current_path):
-                item_path = os.path.join(current_path, item)
-                if EnhancedExclusionStrategy.should_exclude(item_path, is_dir=os.path.isdir(item_path)):
-                    continue
-                if os.path.isdir(item_path):
-                    structure.append(f"{'  ' * depth}╰─ {item}/")
-                    structure.append(self.generate_structure(item_path, depth + 1))
-                else:
-                    structure.append(f"{'  ' * depth}╰─ {item}")
-        except PermissionError:
-            structure.append(f"{'  ' * depth}╰─ [Permission Denied]")
-        except FileNotFoundError:
-            structure.append(f"{'  ' * depth}╰─ [File Not Found]")
-        return "\n".join(structure)
-
-def create_project_generator_script():
-    """Create a new script called `project_generator.py`"""
-    script_content = """
-import os
-import logging
-
-class ProjectBuilder:
-    def __init__(self, project_root: str):
-        self.project_root = project_root
-    
-    def create_directories(self):
-        try:
-            os.makedirs(os.path.join(self.project_root, "src"))
-            os.makedirs(os.path.join(self.project_root, "tests"))
-            os.makedirs(os.path.join(self.project_root, "docs"))
-            logging.info("Directories created successfully!")
-        except Exception as e:
-            logging.error(f"Error creating directories: {str(e)}")
-    
-    def create_files(self):
-        try:
-            with open(os.path.join(self.project_root, "README.md"), 'w') as f:
-                f.write("# Project Overview\\n")
-            logging.info("Project files created successfully!")
-        except Exception as e:
-            logging.error(f"Error creating files: {str(e)}")
-    
-    def build_project(self):
-        logging.info("Building project...")
-        self.create_directories()
-        self.create_files()
-        logging.info("Project build completed!")
-
-def start_building(project_root: str):
-    builder = ProjectBuilder(project_root)
-    builder.build_project()
-
-if __name__ == "__main__":
-    project_root = os.getcwd()
-    start_building(project_root)
-    """
-    with open("project_generator.py", 'w', encoding='utf-8') as f:
-        f.write(script_content)
-    logging.info("project_generator.py created!")
-
-def main():
-    """Main function with enhanced error handling and multithreading"""
-    logging.basicConfig(**LOG_CONFIG)
-    DirectoryObserver.log_event(logging.INFO, "Script started in: " + os.getcwd())
-    
-    parser = argparse.ArgumentParser(description="Directory Generator Script")
-    parser.add_argument("-make_project", type=bool, default=False, help="Create project generator script")
-    args = parser.parse_args()
-
-    try:
-        if args.make_project:
-            create_project_generator_script()
-
-            # Start a new thread to build the project using the newly created script
-            thread = Thread(target=build_project_thread)
-            thread.start()
-            thread.join()
-
-        # Regular directory structure generation
-        processor = SequentialDirectoryFormatter(os.getcwd())
-        raw_structure = processor.generate_structure()
-        
-        final_structure = "\n".join([
-            line for line in raw_structure.split("\n")
-            if not any(excl in line for excl in EXCLUSIONS['files'])
-        ])
-
-        # Save structure to log and copy to clipboard
-        with open('directory-setup.log', 'w', encoding='utf-8') as f:
-            f.write(f"Directory structure for: {os.getcwd()}\n\n")
-            f.write(final_structure)
-        pyperclip.copy(final_structure)
-
-        DirectoryObserver.log_event(logging.INFO, "Structure visualization completed")
-        print(final_structure)
-        
-        # End of file statement
-        with open('directory-setup.log', 'a', encoding='utf-8') as f:
-            f.write("\n" + "="*40)
-            f.write("\nEnd of directory structure\n")
-            f.write("="*40 + "\n")
-    
-    except Exception as e:
-        DirectoryObserver.log_event(logging.CRITICAL, f"Critical failure: {str(e)}")
-        sys.exit(1)
-
-def build_project_thread():
-    """Build the project in a new thread"""
-    logging.info("Building project in a new thread...")
-    sleep(2)  # Simulate time taken to run the build
-    os.system("python project_generator.py")  # Executes the generated project building script
-
-if __name__ == "__main__":
-    main()
+# ----------------------------------------------
+# Script by Ujwol
+# This script is designed to analyze and visualize a directory structure, 
+# log it to a file, and optionally generate a new file called `project_generator.py`. 
+# Additionally, subdirectories are scanned concurrently on a thread pool.
+#
+# - The script can be run normally or with the argument `-make_project=True` to generate a new script
+# - The script will create a new file `project_generator.py` with the functionality to build a project
+# - The generated script is executed in-process, without spawning a new interpreter
+#
+# Usage:
+# python directory-generator.py
+# or 
+# python directory-generator.py -make_project=True
+# python directory-generator.py --clipboard    (also copy the structure to the clipboard)
+# ----------------------------------------------
+
+import importlib.util
+import io
+import os
+import sys
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------- Configuration --------------------
+MAX_DEPTH = 3
+MAX_CONCURRENCY = min(32, (os.cpu_count() or 1) * 4)
+EXCLUSIONS = {
+    'files': [os.path.basename(__file__), 'directory-setup.log', 'directory-generator.log'],
+    'dirs': ['.git', '__pycache__', 'node_modules', 'venv', '.venv', 'env', '.idea'],
+    'patterns': ['.', '~', '$']
+}
+INDENTS = tuple('  ' * depth for depth in range(MAX_DEPTH + 1))
+# Frozen once at import so exclusion checks do hashed lookups without rebuilding containers
+_EXCL_DIRS = frozenset(EXCLUSIONS['dirs'])
+_EXCL_FILES = frozenset(EXCLUSIONS['files'])
+_EXCL_PATTERNS = tuple(EXCLUSIONS['patterns'])
+_EXCL_SUFFIXES = ('.log',)
+_OS_METADATA_FILES = frozenset(('Thumbs.db', '.DS_Store'))
+LOG_CONFIG = {
+    'filename': 'directory-setup.log',
+    'level': logging.INFO,
+    'format': '%(asctime)s - %(levelname)s - %(message)s',
+    'datefmt': '%Y-%m-%d %H:%M:%S'
+}
+# -------------------------------------------------------
+
+class DirectoryObserver:
+    """Observer pattern for logging events"""
+    @staticmethod
+    def log_event(event_type, message):
+        logging.log(event_type, message)
+
+class ExclusionStrategy:
+    """Base exclusion logic with caching"""
+    # Exclusion depends only on the entry name, so decisions are cached per
+    # (basename, is_dir) rather than per full path; each subclass owns its cache.
+    _cache = {}
+    _cache_max_entries = 4096
+
+    @classmethod
+    def should_exclude(cls, entry: os.DirEntry) -> bool:
+        # DirEntry.name and is_dir() come from the directory listing, so no stat is needed
+        key = (entry.name, entry.is_dir(follow_symlinks=False))
+        excluded = cls._cache.get(key)
+        if excluded is None:
+            # Common names (README.md, src/, __init__.py) repeat across a tree, but in a tree
+            # of mostly unique names an unbounded cache would hold one entry per file
+            if len(cls._cache) >= cls._cache_max_entries:
+                cls._cache.clear()
+            excluded = cls._cache[key] = cls.exclude_name(*key)
+        return excluded
+
+    @staticmethod
+    def exclude_name(base_name: str, is_dir: bool = False) -> bool:
+        # Ordered by how often each check hits in real trees: dot-prefixed names first
+        if base_name.startswith(_EXCL_PATTERNS):
+            return True
+        if is_dir:
+            return base_name in _EXCL_DIRS
+        return base_name in _EXCL_FILES or base_name.endswith(_EXCL_SUFFIXES)
+
+class EnhancedExclusionStrategy(ExclusionStrategy):
+    """Enhanced exclusion logic that also skips OS metadata files"""
+    _cache = {}
+
+    @staticmethod
+    def exclude_name(base_name: str, is_dir: bool = False) -> bool:
+        if base_name in _OS_METADATA_FILES:
+            return True
+        return ExclusionStrategy.exclude_name(base_name, is_dir)
+
+class SequentialDirectoryFormatter:
+    """Class to handle the directory structure generation"""
+    def __init__(self, root_path: str, max_concurrency: int = MAX_CONCURRENCY):
+        self.root_path = root_path
+        self.max_concurrency = max_concurrency
+
+    def _scan_one(self, current_path: str, depth: int) -> list:
+        """Scan a single directory into (line, subdir_path, child_depth) tuples"""
+        indent = INDENTS[depth]
+        children = []
+        try:
+            # scandir exposes the file type from the directory listing itself,
+            # so no extra stat call is needed per entry
+            with os.scandir(current_path) as it:
+                for entry in it:
+                    if EnhancedExclusionStrategy.should_exclude(entry):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        children.append((f"{indent}╰─ {entry.name}/", entry.path, depth + 1))
+                    else:
+                        children.append((f"{indent}╰─ {entry.name}", None, depth + 1))
+        except PermissionError:
+            children.append((f"{indent}╰─ [Permission Denied]", None, depth + 1))
+        except FileNotFoundError:
+            children.append((f"{indent}╰─ [File Not Found]", None, depth + 1))
+        return children
+
+    @staticmethod
+    def _subdirs_to_scan(children: list):
+        return [(path, depth) for _, path, depth in children if path is not None and depth < MAX_DEPTH]
+
+    def _walk(self, start_scan):
+        """
+        Yield lines in pre-order. `start_scan(path, depth)` starts listing a directory
+        and returns a callable that waits for its children.
+        """
+        # Subdirectories are scanned as soon as their parent's listing is reached, so
+        # siblings are listed ahead of the walk, but only listings whose lines have not
+        # been yielded yet are held rather than the whole tree.
+        pending = {}
+
+        def expand(children):
+            for subdir, depth in self._subdirs_to_scan(children):
+                pending[subdir] = start_scan(subdir, depth)
+            return reversed(children)
+
+        stack = list(expand(start_scan(self.root_path, 0)()))
+        while stack:
+            line, subdir, _ = stack.pop()
+            yield line
+            if subdir in pending:
+                stack.extend(expand(pending.pop(subdir)()))
+
+    def iter_structure(self):
+        """Yield the rendered lines of the directory structure one at a time"""
+        if self.max_concurrency <= 1:
+            yield from self._walk(lambda path, depth: lambda: self._scan_one(path, depth))
+            return
+
+        # Directory reads are I/O-bound and release the GIL, so sibling subtrees
+        # are scanned concurrently on the pool
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            yield from self._walk(lambda path, depth: executor.submit(self._scan_one, path, depth).result)
+        finally:
+            # Scans queued ahead of a caller that stopped early are not needed
+            executor.shutdown(cancel_futures=True)
+
+    def generate_structure(self) -> str:
+        return "\n".join(self.iter_structure())
+
+def create_project_generator_script():
+    """Create a new script called `project_generator.py`"""
+    script_content = """
+import os
+import logging
+
+class ProjectBuilder:
+    def __init__(self, project_root: str):
+        self.project_root = project_root
+    
+    def create_directories(self):
+        try:
+            os.makedirs(os.path.join(self.project_root, "src"))
+            os.makedirs(os.path.join(self.project_root, "tests"))
+            os.makedirs(os.path.join(self.project_root, "docs"))
+            logging.info("Directories created successfully!")
+        except Exception as e:
+            logging.error(f"Error creating directories: {str(e)}")
+    
+    def create_files(self):
+        try:
+            with open(os.path.join(self.project_root, "README.md"), 'w') as f:
+                f.write("# Project Overview\\n")
+            logging.info("Project files created successfully!")
+        except Exception as e:
+            logging.error(f"Error creating files: {str(e)}")
+    
+    def build_project(self):
+        logging.info("Building project...")
+        self.create_directories()
+        self.create_files()
+        logging.info("Project build completed!")
+
+def start_building(project_root: str):
+    builder = ProjectBuilder(project_root)
+    builder.build_project()
+
+if __name__ == "__main__":
+    project_root = os.getcwd()
+    start_building(project_root)
+    """
+    with open("project_generator.py", 'w', encoding='utf-8') as f:
+        f.write(script_content)
+    logging.info("project_generator.py created!")
+
+def clipboard_available() -> bool:
+    """On Linux a clipboard only exists when an X11 or Wayland display is present"""
+    if sys.platform.startswith('linux'):
+        return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    return True
+
+def main():
+    """Main function with enhanced error handling"""
+    logging.basicConfig(**LOG_CONFIG)
+    DirectoryObserver.log_event(logging.INFO, "Script started in: " + os.getcwd())
+    
+    parser = argparse.ArgumentParser(description="Directory Generator Script")
+    parser.add_argument("-make_project", type=bool, default=False, help="Create project generator script")
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=MAX_CONCURRENCY,
+        help="Number of directories scanned in parallel (1 scans sequentially)",
+    )
+    parser.add_argument("--clipboard", action="store_true", help="Copy the structure to the clipboard")
+    args = parser.parse_args()
+
+    try:
+        if args.make_project:
+            create_project_generator_script()
+            build_project()
+
+        # Regular directory structure generation
+        processor = SequentialDirectoryFormatter(os.getcwd(), max_concurrency=args.max_concurrency)
+        copy_to_clipboard = args.clipboard and clipboard_available()
+        if args.clipboard and not copy_to_clipboard:
+            DirectoryObserver.log_event(logging.WARNING, "No display found, skipping clipboard copy")
+        clipboard_buffer = io.StringIO() if copy_to_clipboard else None
+
+        # Stream each line to the log and stdout as it is produced; excluded
+        # entries are already dropped during traversal by should_exclude
+        with open('directory-setup.log', 'w', encoding='utf-8') as f:
+            f.write(f"Directory structure for: {os.getcwd()}\n\n")
+            for line in processor.iter_structure():
+                f.write(line + "\n")
+                if clipboard_buffer is not None:
+                    clipboard_buffer.write(line + "\n")
+                print(line)
+
+            # End of file statement
+            f.write("="*40)
+            f.write("\nEnd of directory structure\n")
+            f.write("="*40 + "\n")
+
+        if clipboard_buffer is not None:
+            import pyperclip
+
+            pyperclip.copy(clipboard_buffer.getvalue())
+
+        DirectoryObserver.log_event(logging.INFO, "Structure visualization completed")
+    
+    except Exception as e:
+        DirectoryObserver.log_event(logging.CRITICAL, f"Critical failure: {str(e)}")
+        sys.exit(1)
+
+def build_project():
+    """Build the project by loading the generated script into this interpreter"""
+    logging.info("Building project...")
+    spec = importlib.util.spec_from_file_location("project_generator", os.path.abspath("project_generator.py"))
+    project_generator = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(project_generator)
+    project_generator.start_building(os.getcwd())
+
+if __name__ == "__main__":
+    main()
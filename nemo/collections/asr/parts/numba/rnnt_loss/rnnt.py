@@ -27,6 +27,8 @@
 # limitations under the License.
 
 import multiprocessing
+from functools import lru_cache
+from typing import Optional, Union
 
 import torch
 from numba import cuda
@@ -36,6 +38,19 @@ from nemo.collections.asr.parts.numba.rnnt_loss.utils.cpu_utils import cpu_rnnt
 from nemo.collections.asr.parts.numba.rnnt_loss.utils.cuda_utils import gpu_rnnt
 
 
+@lru_cache(maxsize=16)
+def _get_numba_stream(device_index: int, cuda_stream: int):
+    """
+    Wraps a torch CUDA stream handle as a Numba stream.
+
+    The loss is launched on the same few streams every step, so the wrapper is cached per
+    (device, stream handle) instead of being rebuilt on every call.
+    """
+    if hasattr(cuda, 'external_stream'):
+        return cuda.external_stream(cuda_stream)
+    return cuda.default_stream()
+
+
 def rnnt_loss_cpu(
     acts: torch.Tensor,
     labels: torch.Tensor,
@@ -47,6 +62,8 @@ def rnnt_loss_cpu(
     fastemit_lambda: float,
     clamp: float,
     num_threads: int,
+    grad_scale: float = 1.0,
+    workspace: Optional[torch.Tensor] = None,
 ):
     """
     Wrapper method for accessing CPU RNNT loss.
@@ -65,6 +82,10 @@ def rnnt_loss_cpu(
             FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
         clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
         num_threads: Number of threads for OpenMP.
+        grad_scale: Float factor the gradients are scaled by, e.g. 1 / B for a mean reduction.
+        workspace: Optional tensor of the dtype of acts with at least as many elements as
+            `rnnt_helper.get_workspace_size` requests, used as working memory instead of allocating it.
+            Need not be initialized, it is zeroed before use.
     """
     # aliases
     log_probs = acts
@@ -84,7 +105,12 @@ def rnnt_loss_cpu(
     if status != global_constants.RNNTStatus.RNNT_STATUS_SUCCESS:
         raise RuntimeError("Invalid parameter passed when calculating working space memory")
 
-    cpu_workspace = torch.zeros(gpu_size, device=log_probs.device, dtype=log_probs.dtype, requires_grad=False)
+    if workspace is None:
+        cpu_workspace = torch.zeros(gpu_size, device=log_probs.device, dtype=log_probs.dtype, requires_grad=False)
+    elif workspace.numel() < gpu_size:
+        raise ValueError(f"workspace has {workspace.numel()} elements, but {gpu_size} are required")
+    else:
+        cpu_workspace = workspace[:gpu_size].zero_()
 
     ### VIEW TENSORS AS VECTORS FOR POINTER INDEXING ###
     log_probs, acts_shape = rnnt_helper.flatten_tensor(log_probs)
@@ -131,6 +157,9 @@ def rnnt_loss_cpu(
         if status != global_constants.RNNTStatus.RNNT_STATUS_SUCCESS:
             raise RuntimeError("Could not calculate forward scores")
 
+        if grad_scale != 1.0:
+            grads.mul_(grad_scale)
+
     del cpu_workspace, wrapper
     return True
 
@@ -146,6 +175,8 @@ def rnnt_loss_gpu(
     fastemit_lambda: float,
     clamp: float,
     num_threads: int,
+    grad_scale: float = 1.0,
+    workspace: Optional[torch.Tensor] = None,
 ):
     """
     Wrapper method for accessing GPU RNNT loss.
@@ -157,23 +188,26 @@ def rnnt_loss_gpu(
         labels: Ground truth labels of shape [B, U].
         input_lengths: Lengths of the acoustic sequence as a vector of ints [B].
         label_lengths: Lengths of the target sequence as a vector of ints [B].
-        costs: Zero vector of length [B] in which costs will be set.
-        grads: Zero tensor of shape [B, T, U, V+1] where the gradient will be set.
+        costs: Zero vector of length [B] in which costs will be set, or a vector of length 1 in which
+            their sum will be set.
+        grads: Tensor of shape [B, T, U, V+1] where the gradient will be set. Need not be initialized.
         blank_label: Index of the blank token in the vocabulary.
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
             FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
         clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
         num_threads: Number of threads for OpenMP.
+        grad_scale: Float factor applied to the gradients as they are written, e.g. 1 / B for a mean
+            reduction. Saves a separate pass over the gradient tensor.
+        workspace: Optional float32 tensor on the device of acts with at least as many elements as
+            `rnnt_helper.get_workspace_size` requests, used as working memory instead of allocating it.
+            Need not be initialized, it is zeroed before use.
     """
     minibatch_size = acts.shape[0]
     maxT = acts.shape[1]
     maxU = acts.shape[2]
     alphabet_size = acts.shape[3]
 
-    if hasattr(cuda, 'external_stream'):
-        stream = cuda.external_stream(torch.cuda.current_stream(acts.device).cuda_stream)
-    else:
-        stream = cuda.default_stream()
+    stream = _get_numba_stream(acts.device.index, torch.cuda.current_stream(acts.device).cuda_stream)
 
     if num_threads < 0:
         num_threads = multiprocessing.cpu_count()
@@ -186,7 +220,13 @@ def rnnt_loss_gpu(
 
     # Select GPU index
     cuda.select_device(acts.device.index)
-    gpu_workspace = torch.zeros(gpu_size, device=acts.device, dtype=torch.float32, requires_grad=False)
+    if workspace is None:
+        gpu_workspace = torch.zeros(gpu_size, device=acts.device, dtype=torch.float32, requires_grad=False)
+    elif workspace.numel() < gpu_size:
+        raise ValueError(f"workspace has {workspace.numel()} elements, but {gpu_size} are required")
+    else:
+        # The max reduction of the log softmax starts from the values already in the denominators
+        gpu_workspace = workspace[:gpu_size].zero_()
 
     ### VIEW TENSORS AS VECTORS FOR POINTER INDEXING ###
     acts, acts_shape = rnnt_helper.flatten_tensor(acts)
@@ -202,6 +242,7 @@ def rnnt_loss_gpu(
         clamp=clamp,
         num_threads=num_threads,
         stream=stream,
+        grad_scale=grad_scale,
     )
 
     if grads is None:
@@ -246,12 +287,13 @@ def tdt_loss_gpu(
     label_grads: torch.Tensor,
     duration_grads: torch.Tensor,
     blank_label: int,
-    durations: list,
+    durations: Union[list, torch.Tensor],
     fastemit_lambda: float,
     clamp: float,
     num_threads: int,
     sigma: float,
     omega: float,
+    grad_scale: float = 1.0,
 ):
     """
     Wrapper method for accessing GPU TDT loss (https://arxiv.org/abs/2304.06795).
@@ -260,15 +302,20 @@ def tdt_loss_gpu(
 
     Args:
         label_acts: Activation tensor of shape [B, T, U, V], where V includes the blank symbol.
+            May be a view of the first V columns of a wider [B, T, U, V + D] joint tensor.
         duration_acts: Activation tensor of shape [B, T, U, D], where D is the number of durations.
         labels: Ground truth labels of shape [B, U].
         input_lengths: Lengths of the acoustic sequence as a vector of ints [B].
         label_lengths: Lengths of the target sequence as a vector of ints [B].
-        costs: Zero vector of length [B] in which costs will be set.
-        label_grads: Zero tensor of shape [B, T, U, V] where the gradient to label_acts will be set.
-        duration_grads: Zero tensor of shape [B, T, U, D] where the gradient to duration_acts will be set.
+        costs: Zero vector of length [B] in which costs will be set, or a vector of length 1 in which
+            their sum will be set.
+        label_grads: Tensor of shape [B, T, U, V] where the gradient to label_acts will be set.
+            Need not be initialized.
+        duration_grads: Tensor of shape [B, T, U, D] where the gradient to duration_acts will be set.
+            Need not be initialized.
         blank_label: Index of the standard blank token in the vocabulary.
-        durations: A list of supported durations for TDT. Must include 0 and 1.
+        durations: A list of supported durations for TDT. Must include 0 and 1. May also be given as an
+            int64 tensor on the device of label_acts, which is then used as is instead of being uploaded.
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
             FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
         clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
@@ -276,16 +323,15 @@ def tdt_loss_gpu(
         sigma: logit-undernormalization weight used in the multi-blank model. Refer to
             the multi-blank paper https://arxiv.org/abs/2304.06795 for detailed explanations.
         omega: weight for regular RNN-T loss
+        grad_scale: Float factor applied to the gradients as they are written, e.g. 1 / B for a mean
+            reduction. Saves a separate pass over the gradient tensor.
     """
     minibatch_size = label_acts.shape[0]
     maxT = label_acts.shape[1]
     maxU = label_acts.shape[2]
     alphabet_size = label_acts.shape[3]
 
-    if hasattr(cuda, 'external_stream'):
-        stream = cuda.external_stream(torch.cuda.current_stream(label_acts.device).cuda_stream)
-    else:
-        stream = cuda.default_stream()
+    stream = _get_numba_stream(label_acts.device.index, torch.cuda.current_stream(label_acts.device).cuda_stream)
 
     if num_threads < 0:
         num_threads = multiprocessing.cpu_count()
@@ -299,15 +345,13 @@ def tdt_loss_gpu(
 
     # Select GPU index
     cuda.select_device(label_acts.device.index)
-    gpu_workspace = torch.zeros(gpu_size, device=label_acts.device, dtype=label_acts.dtype, requires_grad=False)
-
-    tdt_workspace = torch.zeros(len(durations), device=label_acts.device, dtype=torch.long, requires_grad=False)
+    # Alphas, betas and the softmax denominator are always accumulated in fp32, even for fp16 activations
+    gpu_workspace = torch.zeros(gpu_size, device=label_acts.device, dtype=torch.float32, requires_grad=False)
 
-    for i in range(0, len(durations)):
-        tdt_workspace[i] = durations[i]
+    tdt_workspace = torch.as_tensor(durations, device=label_acts.device, dtype=torch.long)
 
     ### VIEW TENSORS AS VECTORS FOR POINTER INDEXING ###
-    label_acts, label_acts_shape = rnnt_helper.flatten_tensor(label_acts)
+    label_acts, label_acts_stride = rnnt_helper.flatten_strided_rows(label_acts)
     duration_acts, duration_acts_shape = rnnt_helper.flatten_tensor(duration_acts)
 
     wrapper = gpu_rnnt.GPUTDT(
@@ -325,6 +369,8 @@ def tdt_loss_gpu(
         stream=stream,
         sigma=sigma,
         omega=omega,
+        acts_stride=label_acts_stride,
+        grad_scale=grad_scale,
     )
 
     if label_grads is None:
@@ -371,11 +417,12 @@ def multiblank_rnnt_loss_gpu(
     costs: torch.Tensor,
     grads: torch.Tensor,
     blank_label: int,
-    big_blank_durations: list,
+    big_blank_durations: Union[list, torch.Tensor],
     fastemit_lambda: float,
     clamp: float,
     num_threads: int,
     sigma: float,
+    grad_scale: float = 1.0,
 ):
     """
     Wrapper method for accessing GPU Multi-blank RNNT loss (https://arxiv.org/pdf/2211.03541.pdf).
@@ -387,29 +434,31 @@ def multiblank_rnnt_loss_gpu(
         labels: Ground truth labels of shape [B, U].
         input_lengths: Lengths of the acoustic sequence as a vector of ints [B].
         label_lengths: Lengths of the target sequence as a vector of ints [B].
-        costs: Zero vector of length [B] in which costs will be set.
-        grads: Zero tensor of shape [B, T, U, V + num_big_blanks + 1] where the gradient will be set.
+        costs: Zero vector of length [B] in which costs will be set, or a vector of length 1 in which
+            their sum will be set.
+        grads: Tensor of shape [B, T, U, V + num_big_blanks + 1] where the gradient will be set.
+            Need not be initialized.
         blank_label: Index of the standard blank token in the vocabulary.
         big_blank_durations: A list of supported durations for big blank symbols
             in the model, e.g. [2, 4, 8]. Note we only include durations for ``big
             blanks'' here and it should not include 1 for the standard blank.
             Those big blanks have vocabulary indices after the standard blank index.
+            May also be given as an int64 tensor on the device of acts, which is then used as is.
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
             FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
         clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
         num_threads: Number of threads for OpenMP.
         sigma: logit-undernormalization weight used in the multi-blank model. Refer to
             the multi-blank paper https://arxiv.org/pdf/2211.03541 for detailed explanations.
+        grad_scale: Float factor applied to the gradients as they are written, e.g. 1 / B for a mean
+            reduction. Saves a separate pass over the gradient tensor.
     """
     minibatch_size = acts.shape[0]
     maxT = acts.shape[1]
     maxU = acts.shape[2]
     alphabet_size = acts.shape[3]
 
-    if hasattr(cuda, 'external_stream'):
-        stream = cuda.external_stream(torch.cuda.current_stream(acts.device).cuda_stream)
-    else:
-        stream = cuda.default_stream()
+    stream = _get_numba_stream(acts.device.index, torch.cuda.current_stream(acts.device).cuda_stream)
 
     if num_threads < 0:
         num_threads = multiprocessing.cpu_count()
@@ -423,14 +472,10 @@ def multiblank_rnnt_loss_gpu(
 
     # Select GPU index
     cuda.select_device(acts.device.index)
-    gpu_workspace = torch.zeros(gpu_size, device=acts.device, dtype=acts.dtype, requires_grad=False)
-
-    big_blank_workspace = torch.zeros(
-        len(big_blank_durations), device=acts.device, dtype=torch.long, requires_grad=False
-    )
+    # Alphas, betas and the softmax denominator are always accumulated in fp32, even for fp16 activations
+    gpu_workspace = torch.zeros(gpu_size, device=acts.device, dtype=torch.float32, requires_grad=False)
 
-    for i in range(0, len(big_blank_durations)):
-        big_blank_workspace[i] = big_blank_durations[i]
+    big_blank_workspace = torch.as_tensor(big_blank_durations, device=acts.device, dtype=torch.long)
 
     ### VIEW TENSORS AS VECTORS FOR POINTER INDEXING ###
     acts, acts_shape = rnnt_helper.flatten_tensor(acts)
@@ -449,6 +494,7 @@ def multiblank_rnnt_loss_gpu(
         num_threads=num_threads,
         stream=stream,
         sigma=sigma,
+        grad_scale=grad_scale,
     )
 
     if grads is None:
@@ -27,19 +27,85 @@
 # limitations under the License.
 
 
+import numpy as np
 import torch
 from torch.autograd import Function
 from torch.nn import Module
 
 from nemo.collections.asr.parts.numba.rnnt_loss import rnnt
+from nemo.collections.asr.parts.numba.rnnt_loss.utils import rnnt_helper
 from nemo.collections.asr.parts.numba.rnnt_loss.utils.cpu_utils import cpu_rnnt
 
 __all__ = ['rnnt_loss', 'RNNTLossNumba', 'MultiblankRNNTLossNumba', 'TDTLossNumba']
 
 
+def to_kernel_dtype(acts: torch.Tensor) -> torch.Tensor:
+    """
+    Returns activations in a dtype the Numba CUDA kernels can read.
+
+    fp32 and fp16 activations are used as is; the kernels read them in their storage dtype and accumulate
+    alphas, betas, denominators and costs in fp32. Numba has no bfloat16 type, so bf16 activations are not
+    read in place: they are upcast to a full fp32 copy of the joint on every call, and the kernels write fp32
+    gradients next to it. During the loss, a bf16 joint therefore takes more memory than an fp16 one, not
+    less. Only the bf16 cast of the gradients is kept for backward.
+    """
+    if acts.dtype == torch.bfloat16:
+        return acts.float()
+    return acts
+
+
+def scale_grads(grads: torch.Tensor, grad_output: torch.Tensor) -> torch.Tensor:
+    """
+    Scales the gradients saved in forward by the incoming grad_output, in place.
+
+    The multiply stays on the device even for the single grad_output value of the 'sum' and 'mean'
+    reductions, so backward never synchronizes with the host and remains capturable in a CUDA graph.
+    It is not skipped when grad_output is 1: finding that out means reading grad_output on the host,
+    which is the same sync. For the same reason a reduced grad_output is not turned into a Python scalar
+    with `.item()`; as a 0-D tensor it is multiplied in directly, without a view to broadcast it.
+    """
+    if grad_output.dim() == 0:
+        return grads.mul_(grad_output.to(grads))
+    return grads.mul_(grad_output.view(-1, 1, 1, 1).to(grads))
+
+
+def new_costs(minibatch_size: int, device: torch.device, requires_grad: bool, reduction: str) -> torch.Tensor:
+    """
+    Allocates the buffer the loss kernels write costs into.
+
+    Forward-only CUDA calls with the 'sum' or 'mean' reduction only need the total, which the kernels write
+    into a single element instead of a vector of per-example costs.
+
+    Buffers are not pooled across calls: with the 'none' reduction this tensor is returned to the caller, so a
+    reused buffer would be overwritten under costs the caller still holds. The caching allocator already
+    serves these small allocations without a cudaMalloc.
+    """
+    if device.type == 'cuda' and not requires_grad and reduction in ('sum', 'mean'):
+        return torch.empty(1, device=device, dtype=torch.float32)
+    return torch.zeros(minibatch_size, device=device, dtype=torch.float32)
+
+
+def reduce_costs(costs: torch.Tensor, reduction: str, minibatch_size: int) -> torch.Tensor:
+    """
+    Applies the reduction to per-example costs, or finishes it for costs the kernels already summed.
+    The 'sum' and 'mean' reductions return a 0-D tensor.
+    """
+    if costs.shape[0] != minibatch_size:
+        # Summed by the loss kernels, see new_costs
+        costs = costs.squeeze(0)
+        return costs / minibatch_size if reduction == 'mean' else costs
+    if reduction == 'sum':
+        return costs.sum()
+    if reduction == 'mean':
+        return costs.mean()
+    return costs
+
+
 class _RNNTNumba(Function):
     @staticmethod
-    def forward(ctx, acts, labels, act_lens, label_lens, blank, reduction, fastemit_lambda, clamp):
+    def forward(
+        ctx, acts, labels, act_lens, label_lens, blank, reduction, fastemit_lambda, clamp, align=1, workspace=None
+    ):
         """
         log_probs: Tensor of (batch x seqLength x labelLength x outputDim) containing output from network
         labels: 2 dimensional Tensor containing all the targets of the batch with zero padded
@@ -47,6 +113,10 @@ class _RNNTNumba(Function):
         label_lens: Tensor of (batch) containing label length of each example
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
             FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
+        align: On CUDA, pad the vocabulary dim of acts up to a multiple of this value so that every
+            row starts on an aligned address. Padded columns are filled with -inf and do not change
+            the loss. Default 1 (no padding).
+        workspace: Optional preallocated working memory for the loss, refer to `rnnt.rnnt_loss_gpu`.
         """
         is_cuda = acts.is_cuda
 
@@ -54,10 +124,25 @@ class _RNNTNumba(Function):
         if clamp < 0:
             raise ValueError("`clamp` must be 0.0 or positive float value.")
 
+        # Padded or upcast copies of acts do not carry requires_grad, so check it on the input
+        requires_grad = acts.requires_grad
+        vocab_size = acts.shape[-1]
+        grad_dtype = acts.dtype
+        if is_cuda:
+            acts = pad_vocab(to_kernel_dtype(acts), align)
+
         loss_func = rnnt.rnnt_loss_gpu if is_cuda else rnnt.rnnt_loss_cpu
-        grads = torch.zeros_like(acts) if acts.requires_grad else None
+        if requires_grad:
+            # The CUDA gradient kernel writes every element (zeroing padded cells itself), whereas
+            # the CPU path only scatters into the cells that are reachable in the lattice.
+            grads = torch.empty_like(acts) if is_cuda else torch.zeros_like(acts)
+        else:
+            grads = None
         minibatch_size = acts.size(0)
-        costs = torch.zeros(minibatch_size, device=acts.device, dtype=torch.float32)
+        costs = new_costs(minibatch_size, acts.device, requires_grad, reduction)
+
+        # The mean reduction of the gradients is folded into the loss kernel
+        grad_scale = 1.0 / minibatch_size if reduction == 'mean' else 1.0
 
         loss_func(
             acts,
@@ -69,16 +154,60 @@ class _RNNTNumba(Function):
             blank_label=blank,
             fastemit_lambda=fastemit_lambda,
             clamp=clamp,
-            num_threads=0,
+            # the CPU loss follows PyTorch's intra-op thread setting, the CUDA loss needs no CPU threads
+            num_threads=0 if is_cuda else torch.get_num_threads(),
+            grad_scale=grad_scale,
+            workspace=workspace,
         )
 
-        if reduction in ['sum', 'mean']:
-            costs = costs.sum().unsqueeze_(-1)
-            if reduction == 'mean':
-                costs /= minibatch_size
+        costs = reduce_costs(costs, reduction, minibatch_size)
+
+        if grads is not None:
+            if grads.shape[-1] != vocab_size:
+                grads = grads[..., :vocab_size]
+            grads = grads.to(grad_dtype)
+
+        ctx.save_for_backward(grads)
+
+        return costs
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        (grads,) = ctx.saved_tensors
+        if grad_output is not None and grads is not None:
+            return scale_grads(grads, grad_output), None, None, None, None, None, None, None, None, None
+
+
+class _RNNTNumbaFusedCPU(Function):
+    @staticmethod
+    def forward(ctx, acts, labels, act_lens, label_lens, blank, reduction, fastemit_lambda):
+        """
+        acts: Tensor of (batch x seqLength x labelLength x outputDim) of unnormalized CPU activations.
+            The log softmax is computed inside the loss kernel, and gradients are not clamped.
+        For other parameters for this class, refer to comment for class _RNNTNumba
+        """
+        certify_inputs(acts, labels, act_lens, label_lens)
 
-                if grads is not None:
-                    grads /= minibatch_size
+        grads = torch.empty_like(acts) if acts.requires_grad else None
+        minibatch_size = acts.size(0)
+        costs = torch.zeros(minibatch_size, device=acts.device, dtype=torch.float32)
+
+        # The mean reduction of the gradients is folded into the loss kernel
+        grad_scale = 1.0 / minibatch_size if reduction == 'mean' else 1.0
+
+        cpu_rnnt.fused_rnnt_loss_cpu(
+            acts,
+            labels=labels,
+            input_lengths=act_lens,
+            label_lengths=label_lens,
+            costs=costs,
+            grads=grads,
+            blank_label=blank,
+            fastemit_lambda=fastemit_lambda,
+            grad_scale=grad_scale,
+        )
+
+        costs = reduce_costs(costs, reduction, minibatch_size)
 
         ctx.save_for_backward(grads)
 
@@ -88,8 +217,7 @@ class _RNNTNumba(Function):
     def backward(ctx, grad_output):
         (grads,) = ctx.saved_tensors
         if grad_output is not None and grads is not None:
-            grad_output = grad_output.view(-1, 1, 1, 1).to(grads)
-            return grads.mul_(grad_output), None, None, None, None, None, None, None
+            return scale_grads(grads, grad_output), None, None, None, None, None, None
 
 
 class _TDTNumba(Function):
@@ -121,7 +249,7 @@ class _TDTNumba(Function):
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
             FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
         durations: list of durations for TDT model, must include 0 and 1, e.g.
-            [0, 1, 2, 3, 4].
+            [0, 1, 2, 3, 4]. May also be an int64 tensor on the device of the acts.
         sigma: hyper-parameter for logit under-normalization method for training
             TDT models. Recommended value 0.05.
         omega: probability for sampling the standard RNN-T loss.
@@ -130,7 +258,10 @@ class _TDTNumba(Function):
         """
         is_cuda = label_acts.is_cuda
 
-        certify_inputs(label_acts, labels, act_lens, label_lens)
+        # label_acts may be a strided view into the joint tensor, so shapes and contiguity are
+        # certified on duration_acts, which shares its [B, T, U] dims; the row layout of
+        # label_acts is validated when it is flattened for the kernels.
+        certify_inputs(duration_acts, labels, act_lens, label_lens)
         if clamp < 0:
             raise ValueError("`clamp` must be 0.0 or positive float value.")
 
@@ -139,10 +270,20 @@ class _TDTNumba(Function):
         else:
             raise ValueError("TDT is not yet implemented for non CUDA computation.")
 
-        label_grads = torch.zeros_like(label_acts) if label_acts.requires_grad else None
-        duration_grads = torch.zeros_like(duration_acts) if duration_acts.requires_grad else None
+        # Upcast copies of the acts do not carry requires_grad, so check it on the inputs
+        requires_grad = label_acts.requires_grad
+        grad_dtype = label_acts.dtype
+        label_acts = to_kernel_dtype(label_acts)
+        duration_acts = to_kernel_dtype(duration_acts)
+
+        # The gradient kernels write every element, padded cells included
+        label_grads = torch.empty_like(label_acts, memory_format=torch.contiguous_format) if requires_grad else None
+        duration_grads = torch.empty_like(duration_acts) if requires_grad else None
         minibatch_size = label_acts.size(0)
-        costs = torch.zeros(minibatch_size, device=label_acts.device, dtype=label_acts.dtype)
+        costs = new_costs(minibatch_size, label_acts.device, requires_grad, reduction)
+
+        # The mean reduction of the gradients is folded into the loss kernel
+        grad_scale = 1.0 / minibatch_size if reduction == 'mean' else 1.0
 
         loss_func(
             label_acts,
@@ -160,16 +301,14 @@ class _TDTNumba(Function):
             sigma=sigma,
             omega=omega,
             num_threads=0,
+            grad_scale=grad_scale,
         )
 
-        if reduction in ['sum', 'mean']:
-            costs = costs.sum().unsqueeze_(-1)
-            if reduction == 'mean':
-                costs /= minibatch_size
+        costs = reduce_costs(costs, reduction, minibatch_size)
 
-                if label_grads is not None:
-                    label_grads /= minibatch_size
-                    duration_grads /= minibatch_size
+        if label_grads is not None:
+            label_grads = label_grads.to(grad_dtype)
+            duration_grads = duration_grads.to(grad_dtype)
 
         ctx.save_for_backward(label_grads, duration_grads)
 
@@ -179,10 +318,9 @@ class _TDTNumba(Function):
     def backward(ctx, grad_output):
         label_grads, duration_grads = ctx.saved_tensors
         if grad_output is not None and label_grads is not None:
-            grad_output = grad_output.view(-1, 1, 1, 1).to(label_grads)
             return (
-                label_grads.mul_(grad_output),
-                duration_grads.mul_(grad_output),
+                scale_grads(label_grads, grad_output),
+                scale_grads(duration_grads, grad_output),
                 None,
                 None,
                 None,
@@ -203,11 +341,22 @@ class _MultiblankRNNTNumba(Function):
 
     @staticmethod
     def forward(
-        ctx, acts, labels, act_lens, label_lens, blank, big_blank_durations, reduction, fastemit_lambda, clamp, sigma
+        ctx,
+        acts,
+        labels,
+        act_lens,
+        label_lens,
+        blank,
+        big_blank_durations,
+        reduction,
+        fastemit_lambda,
+        clamp,
+        sigma,
+        align=1,
     ):
         """
         big_blank_durations: list of durations for multi-blank transducer, e.g.
-            [2, 4, 8].
+            [2, 4, 8]. May also be an int64 tensor on the device of the acts.
         sigma: hyper-parameter for logit under-normalization method for training
             multi-blank transducers. Recommended value 0.05.
         Refer to https://arxiv.org/pdf/2211.03541 for detailed explanations for
@@ -225,9 +374,19 @@ class _MultiblankRNNTNumba(Function):
         else:
             raise NotImplementedError()
 
-        grads = torch.zeros_like(acts) if acts.requires_grad else None
+        # Padding columns sit after the big blanks, so every blank index is unchanged
+        requires_grad = acts.requires_grad
+        vocab_size = acts.shape[-1]
+        grad_dtype = acts.dtype
+        acts = pad_vocab(to_kernel_dtype(acts), align)
+
+        # The gradient kernel writes every element, padded cells included
+        grads = torch.empty_like(acts) if requires_grad else None
         minibatch_size = acts.size(0)
-        costs = torch.zeros(minibatch_size, device=acts.device, dtype=acts.dtype)
+        costs = new_costs(minibatch_size, acts.device, requires_grad, reduction)
+
+        # The mean reduction of the gradients is folded into the loss kernel
+        grad_scale = 1.0 / minibatch_size if reduction == 'mean' else 1.0
 
         loss_func(
             acts,
@@ -242,15 +401,15 @@ class _MultiblankRNNTNumba(Function):
             clamp=clamp,
             sigma=sigma,
             num_threads=0,
+            grad_scale=grad_scale,
         )
 
-        if reduction in ['sum', 'mean']:
-            costs = costs.sum().unsqueeze_(-1)
-            if reduction == 'mean':
-                costs /= minibatch_size
+        costs = reduce_costs(costs, reduction, minibatch_size)
 
-                if grads is not None:
-                    grads /= minibatch_size
+        if grads is not None:
+            if grads.shape[-1] != vocab_size:
+                grads = grads[..., :vocab_size]
+            grads = grads.to(grad_dtype)
 
         ctx.save_for_backward(grads)
 
@@ -260,12 +419,46 @@ class _MultiblankRNNTNumba(Function):
     def backward(ctx, grad_output):
         (grads,) = ctx.saved_tensors
         if grad_output is not None and grads is not None:
-            grad_output = grad_output.view(-1, 1, 1, 1).to(grads)
-            return grads.mul_(grad_output), None, None, None, None, None, None, None, None, None, None
+            return (
+                scale_grads(grads, grad_output),
+                None,
+                None,
+                None,
+                None,
+                None,
+                None,
+                None,
+                None,
+                None,
+                None,
+                None,
+            )
+
+
+def pad_vocab(acts: torch.Tensor, align: int) -> torch.Tensor:
+    """
+    Pads the vocabulary (last) dim of acts with -inf up to a multiple of `align`.
+
+    The padded columns have zero probability after the log softmax computed inside the CUDA kernels,
+    so they do not change the loss and receive zero gradient. Returns acts unchanged if it is already aligned.
+    """
+    pad = -acts.shape[-1] % align
+    if pad == 0:
+        return acts
+
+    return torch.nn.functional.pad(acts, (0, pad), value=float('-inf'))
 
 
 def rnnt_loss(
-    acts, labels, act_lens, label_lens, blank=0, reduction='mean', fastemit_lambda: float = 0.0, clamp: float = 0.0
+    acts,
+    labels,
+    act_lens,
+    label_lens,
+    blank=0,
+    reduction='mean',
+    fastemit_lambda: float = 0.0,
+    clamp: float = 0.0,
+    align: int = 1,
 ):
     """RNN Transducer Loss (functional form)
     Args:
@@ -278,21 +471,20 @@ def rnnt_loss(
             'none' | 'mean' | 'sum'. 'none': no reduction will be applied,
             'mean': the output losses will be divided by the target lengths and
             then the mean over the batch is taken. Default: 'mean'
+        align (int, optional): On CUDA, pad the vocabulary dim up to a multiple of this value
+            (e.g. 8, or 16/64 for larger tensor core tiles). Default: 1 (no padding).
     """
     if not acts.is_cuda:
         # Since CPU requires log_softmax to be computed explicitly, we need to perform grad clipping
         # *after* we have obtained the gradients of loss(logsoftmax()).
-        # This is highly wasteful since it requires a copy of the entire joint tensor which is expensive.
-        # CUDA version is much more efficient since it performs an inplace logsoftmax, and therefore
-        # can inplace clamp the gradient.
-        if clamp > 0.0:
-            acts = cpu_rnnt.LogSoftmaxGradModification.apply(acts, clamp)
-
+        # The fused op computes log_softmax and clamps its gradient in a single pass over the joint
+        # tensor, instead of copying it first. CUDA version performs the logsoftmax and gradient
+        # clamping inplace within the kernel.
         # NOTE manually done log_softmax for CPU version,
         # log_softmax is computed within GPU version.
-        acts = torch.nn.functional.log_softmax(acts, -1)
+        acts = cpu_rnnt.log_softmax_clamp_grad(acts, clamp)
 
-    return _RNNTNumba.apply(acts, labels, act_lens, label_lens, blank, reduction, fastemit_lambda, clamp)
+    return _RNNTNumba.apply(acts, labels, act_lens, label_lens, blank, reduction, fastemit_lambda, clamp, align)
 
 
 def multiblank_rnnt_loss(
@@ -301,7 +493,7 @@ def multiblank_rnnt_loss(
     act_lens,
     label_lens,
     blank,
-    big_blank_durations=[],
+    big_blank_durations=(),
     reduction='mean',
     fastemit_lambda: float = 0.0,
     clamp: float = 0.0,
@@ -328,15 +520,12 @@ def multiblank_rnnt_loss(
     if not acts.is_cuda:
         # Since CPU requires log_softmax to be computed explicitly, we need to perform grad clipping
         # *after* we have obtained the gradients of loss(logsoftmax()).
-        # This is highly wasteful since it requires a copy of the entire joint tensor which is expensive.
-        # CUDA version is much more efficient since it performs an inplace logsoftmax, and therefore
-        # can inplace clamp the gradient.
-        if clamp > 0.0:
-            acts = cpu_rnnt.LogSoftmaxGradModification.apply(acts, clamp)
-
+        # The fused op computes log_softmax and clamps its gradient in a single pass over the joint
+        # tensor, instead of copying it first. CUDA version performs the logsoftmax and gradient
+        # clamping inplace within the kernel.
         # NOTE manually done log_softmax for CPU version,
         # log_softmax is computed within GPU version.
-        acts = torch.nn.functional.log_softmax(acts, -1)
+        acts = cpu_rnnt.log_softmax_clamp_grad(acts, clamp)
 
     return _MultiblankRNNTNumba.apply(
         acts, labels, act_lens, label_lens, blank, big_blank_durations, reduction, fastemit_lambda, clamp
@@ -349,7 +538,7 @@ def tdt_loss(
     act_lens,
     label_lens,
     blank,
-    durations=[],
+    durations=(),
     reduction='mean',
     fastemit_lambda: float = 0.0,
     clamp: float = 0.0,
@@ -376,15 +565,12 @@ def tdt_loss(
     if not acts.is_cuda:
         # Since CPU requires log_softmax to be computed explicitly, we need to perform grad clipping
         # *after* we have obtained the gradients of loss(logsoftmax()).
-        # This is highly wasteful since it requires a copy of the entire joint tensor which is expensive.
-        # CUDA version is much more efficient since it performs an inplace logsoftmax, and therefore
-        # can inplace clamp the gradient.
-        if clamp > 0.0:
-            acts = cpu_rnnt.LogSoftmaxGradModification.apply(acts, clamp)
-
+        # The fused op computes log_softmax and clamps its gradient in a single pass over the joint
+        # tensor, instead of copying it first. CUDA version performs the logsoftmax and gradient
+        # clamping inplace within the kernel.
         # NOTE manually done log_softmax for CPU version,
         # log_softmax is computed within GPU version.
-        acts = torch.nn.functional.log_softmax(acts, -1)
+        acts = cpu_rnnt.log_softmax_clamp_grad(acts, clamp)
 
     return _TDTNumba.apply(acts, labels, act_lens, label_lens, blank, durations, reduction, fastemit_lambda, clamp)
 
@@ -400,15 +586,109 @@ class RNNTLossNumba(Module):
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
                 FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
         clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
+        align: On CUDA, pad the vocabulary dim of the joint tensor up to a multiple of this value
+            (e.g. 8, or 16/64 for larger tensor core tiles). Padding costs one extra copy of the joint,
+            so it only pays off for unaligned vocabularies. Default: 1 (no padding).
     """
 
-    def __init__(self, blank=0, reduction='mean', fastemit_lambda: float = 0.0, clamp: float = -1):
+    # Unclamped CPU joints with fewer elements than this skip the separate log_softmax pass
+    small_batch_numel = 1 << 20
+
+    def __init__(self, blank=0, reduction='mean', fastemit_lambda: float = 0.0, clamp: float = -1, align: int = 1):
         super(RNNTLossNumba, self).__init__()
         self.blank = blank
         self.fastemit_lambda = fastemit_lambda
         self.clamp = float(clamp) if clamp > 0 else 0.0
         self.reduction = reduction
+        self.align = align
         self.loss = _RNNTNumba.apply
+        # CUDA working memory of this loss module, one buffer per (device, stream), see _get_workspace
+        self._workspace_cache = {}
+        # CUDA graphs of the forward-only loss, see forward_graph_capture
+        self._graphs = {}
+
+    def _get_workspace(self, acts):
+        """
+        Returns working memory for the CUDA loss on the device of acts, reused across calls.
+
+        Buffers belong to this module and are keyed on the current stream. Kernels that use a buffer are
+        queued on that stream, so a later call on the same stream cannot overwrite it before the previous
+        loss has finished with it. Calls on different streams get separate buffers; a buffer must not be
+        handed to work on another stream without synchronizing the two.
+
+        T and U change with every batch of variable length utterances, so rather than one buffer per shape,
+        a buffer grows to the largest size requested on its stream. It is reallocated at the requested size
+        once that is less than a quarter of the buffer, so a single outlier batch is not held forever.
+        """
+        size, _ = rnnt_helper.get_workspace_size(acts.shape[1], acts.shape[2], acts.shape[0], gpu=True)
+        if size is None:
+            # Invalid shapes are reported by the loss itself
+            return None
+
+        if torch.cuda.is_current_stream_capturing():
+            # Allocations made during CUDA graph capture come from the graph's private pool and live as
+            # long as the graph, whereas a cached buffer could be replaced while the graph still uses it
+            return torch.empty(size, device=acts.device, dtype=torch.float32)
+
+        key = (acts.device, torch.cuda.current_stream(acts.device).cuda_stream)
+        workspace = self._workspace_cache.get(key)
+        if workspace is None or workspace.numel() < size or workspace.numel() > 4 * size:
+            workspace = torch.empty(size, device=acts.device, dtype=torch.float32)
+            self._workspace_cache[key] = workspace
+        return workspace
+
+    def _graph_key(self, acts, labels):
+        # The loss settings are baked into the captured kernels, so a graph only serves the settings it was
+        # captured with
+        return (
+            acts.shape,
+            acts.dtype,
+            labels.shape,
+            acts.device,
+            self.blank,
+            self.reduction,
+            self.fastemit_lambda,
+            self.clamp,
+        )
+
+    def forward_graph_capture(self, acts, labels, act_lens, label_lens):
+        """
+        Captures the forward-only loss for inputs of these shapes into a CUDA graph, and returns its costs.
+
+        Later calls to `forward` with CUDA inputs of the same shapes and dtypes, made without tracking
+        gradients, copy their inputs into the captured buffers and replay the graph instead of launching
+        every kernel. Graphs for several shapes, e.g. different batch sizes, coexist. Meant for streaming
+        evaluation with fixed small batches, where kernel launch overhead dominates. Changing `blank`,
+        `reduction`, `fastemit_lambda` or `clamp` afterwards falls back to eager calls until recaptured.
+
+        The inputs are validated by the eager warm-up calls, and the captured region itself never syncs
+        with the host. On replay the lengths are not checked against the padded dims of acts and labels.
+
+        Args are the same as for `forward`, and must be CUDA tensors.
+        """
+        if not acts.is_cuda:
+            raise ValueError("CUDA graph capture requires CUDA inputs.")
+
+        key = self._graph_key(acts, labels)
+        self._graphs.pop(key, None)
+        static_inputs = tuple(x.detach().clone() for x in (acts, labels, act_lens, label_lens))
+
+        # Warm up on a side stream, so that the Numba kernels are compiled before capture
+        current_stream = torch.cuda.current_stream(acts.device)
+        side_stream = torch.cuda.Stream(acts.device)
+        side_stream.wait_stream(current_stream)
+        with torch.no_grad(), torch.cuda.stream(side_stream):
+            for _ in range(3):
+                self.forward(*static_inputs)
+        current_stream.wait_stream(side_stream)
+
+        graph = torch.cuda.CUDAGraph()
+        with torch.no_grad(), torch.cuda.graph(graph):
+            static_costs = self.forward(*static_inputs)
+
+        self._graphs[key] = (graph, static_inputs, static_costs)
+        graph.replay()
+        return static_costs.clone()
 
     def forward(self, acts, labels, act_lens, label_lens):
         """
@@ -417,25 +697,56 @@ class RNNTLossNumba(Module):
         act_lens: Tensor of size (batch) containing size of each output sequence from the network
         label_lens: Tensor of (batch) containing label length of each example
         """
+        if self._graphs and acts.is_cuda and not (torch.is_grad_enabled() and acts.requires_grad):
+            captured = self._graphs.get(self._graph_key(acts, labels))
+            if captured is not None:
+                graph, static_inputs, static_costs = captured
+                for static_input, x in zip(static_inputs, (acts, labels, act_lens, label_lens)):
+                    static_input.copy_(x)
+                graph.replay()
+                # The captured costs are overwritten by the next replay
+                return static_costs.clone()
+
         if not acts.is_cuda:
             # Force FP32 until log_softmax() is implemented for fp16 on CPU
             if acts.dtype == torch.float16:
                 acts = acts.float()
 
+            if (
+                self.clamp == 0.0
+                and acts.dtype in (torch.float32, torch.float64)
+                and acts.numel() < self.small_batch_numel
+                and acts.is_contiguous()
+            ):
+                # Small joints are dominated by materializing the log_softmax, so a single kernel
+                # normalizes each cell while it computes the lattice.
+                return _RNNTNumbaFusedCPU.apply(
+                    acts, labels, act_lens, label_lens, self.blank, self.reduction, self.fastemit_lambda
+                )
+
             # Since CPU requires log_softmax to be computed explicitly, we need to perform grad clipping
             # *after* we have obtained the gradients of loss(logsoftmax()).
-            # This is highly wasteful since it requires a copy of the entire joint tensor which is expensive.
-            # CUDA version is much more efficient since it performs an inplace logsoftmax, and therefore
-            # can inplace clamp the gradient.
-            if self.clamp > 0.0:
-                acts = cpu_rnnt.LogSoftmaxGradModification.apply(acts, self.clamp)
-
+            # The fused op computes log_softmax and clamps its gradient in a single pass over the joint
+            # tensor, instead of copying it first. CUDA version performs the logsoftmax and gradient
+            # clamping inplace within the kernel.
             # NOTE manually done log_softmax for CPU version,
             # log_softmax is computed within GPU version.
-            acts = torch.nn.functional.log_softmax(acts, -1)
+            acts = cpu_rnnt.log_softmax_clamp_grad(acts, self.clamp)
+            workspace = None
+        else:
+            workspace = self._get_workspace(acts)
 
         return self.loss(
-            acts, labels, act_lens, label_lens, self.blank, self.reduction, self.fastemit_lambda, self.clamp
+            acts,
+            labels,
+            act_lens,
+            label_lens,
+            self.blank,
+            self.reduction,
+            self.fastemit_lambda,
+            self.clamp,
+            self.align,
+            workspace,
         )
 
 
@@ -456,6 +767,8 @@ class MultiblankRNNTLossNumba(Module):
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
                 FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
         clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
+        align: Pad the vocabulary dim of the joint tensor up to a multiple of this value.
+            Refer to RNNTLossNumba. Default: 1 (no padding).
     """
 
     def __init__(
@@ -466,15 +779,22 @@ class MultiblankRNNTLossNumba(Module):
         fastemit_lambda: float = 0.0,
         clamp: float = -1,
         sigma: float = 0.0,
+        align: int = 1,
     ):
         super(MultiblankRNNTLossNumba, self).__init__()
         self.blank = blank
         self.big_blank_durations = big_blank_durations
+        # Converted once from the list, array or tensor, then uploaded once per device instead of on every forward
+        self._big_blank_np = np.ascontiguousarray(
+            () if big_blank_durations is None else big_blank_durations, dtype=np.int64
+        )
+        self._durations_tensor_cache = {}
         self.fastemit_lambda = fastemit_lambda
         self.clamp = float(clamp) if clamp > 0 else 0.0
         self.reduction = reduction
         self.loss = _MultiblankRNNTNumba.apply
         self.sigma = sigma
+        self.align = align
 
     def forward(self, acts, labels, act_lens, label_lens):
         """
@@ -486,15 +806,17 @@ class MultiblankRNNTLossNumba(Module):
         if not acts.is_cuda:
             # Since CPU requires log_softmax to be computed explicitly, we need to perform grad clipping
             # *after* we have obtained the gradients of loss(logsoftmax()).
-            # This is highly wasteful since it requires a copy of the entire joint tensor which is expensive.
-            # CUDA version is much more efficient since it performs an inplace logsoftmax, and therefore
-            # can inplace clamp the gradient.
-            if self.clamp > 0.0:
-                acts = cpu_rnnt.LogSoftmaxGradModification.apply(acts, self.clamp)
-
+            # The fused op computes log_softmax and clamps its gradient in a single pass over the joint
+            # tensor, instead of copying it first. CUDA version performs the logsoftmax and gradient
+            # clamping inplace within the kernel.
             # NOTE manually done log_softmax for CPU version,
             # log_softmax is computed within GPU version.
-            acts = torch.nn.functional.log_softmax(acts, -1)
+            acts = cpu_rnnt.log_softmax_clamp_grad(acts, self.clamp)
+
+        big_blank_durations = self._durations_tensor_cache.get(acts.device)
+        if big_blank_durations is None:
+            big_blank_durations = torch.from_numpy(self._big_blank_np).to(acts.device)
+            self._durations_tensor_cache[acts.device] = big_blank_durations
 
         return self.loss(
             acts,
@@ -502,11 +824,12 @@ class MultiblankRNNTLossNumba(Module):
             act_lens,
             label_lens,
             self.blank,
-            self.big_blank_durations,
+            big_blank_durations,
             self.reduction,
             self.fastemit_lambda,
             self.clamp,
             self.sigma,
+            self.align,
         )
 
 
@@ -544,6 +867,9 @@ class TDTLossNumba(Module):
         super(TDTLossNumba, self).__init__()
         self.blank = blank
         self.durations = durations if durations is not None else []
+        # Converted once from the Python list, then uploaded once per device instead of on every forward
+        self._durations_np = np.ascontiguousarray(self.durations, dtype=np.int64)
+        self._durations_tensor_cache = {}
         self.fastemit_lambda = fastemit_lambda
         self.clamp = float(clamp) if clamp > 0 else 0.0
         self.reduction = reduction
@@ -559,14 +885,18 @@ class TDTLossNumba(Module):
         label_lens: Tensor of (batch) containing label length of each example
         """
 
-        # TODO(hainan): in the future, we could further optimize this so that we don't need to
-        # make contiguous copies of the acts tensor.
+        # label_acts stays a strided view into acts; the kernels step over the duration
+        # columns using the row stride, so only the small duration log-softmax is materialized.
         label_acts, duration_acts = torch.split(
-            acts, [acts.shape[-1] - len(self.durations), len(self.durations)], dim=-1
+            acts.contiguous(), [acts.shape[-1] - len(self.durations), len(self.durations)], dim=-1
         )
-        label_acts = label_acts.contiguous()
         duration_acts = torch.nn.functional.log_softmax(duration_acts, dim=-1).contiguous()
 
+        durations = self._durations_tensor_cache.get(acts.device)
+        if durations is None:
+            durations = torch.from_numpy(self._durations_np).to(acts.device)
+            self._durations_tensor_cache[acts.device] = durations
+
         return self.loss(
             label_acts,
             duration_acts,
@@ -574,7 +904,7 @@ class TDTLossNumba(Module):
             act_lens,
             label_lens,
             self.blank,
-            self.durations,
+            durations,
             self.reduction,
             self.fastemit_lambda,
             self.clamp,
@@ -598,7 +928,7 @@ def check_dim(var, dim, name):
         raise ValueError("{} must be {}D".format(name, dim))
 
 
-def certify_inputs(log_probs, labels, lengths, label_lengths):
+def _slow_certify(log_probs, labels, lengths, label_lengths):
     # check_type(log_probs, torch.float32, "log_probs")
     check_type(labels, torch.int64, "labels")
     check_type(label_lengths, torch.int64, "label_lengths")
@@ -625,10 +955,34 @@ def certify_inputs(log_probs, labels, lengths, label_lengths):
     check_dim(labels, 2, "labels")
     check_dim(lengths, 1, "lenghts")
     check_dim(label_lengths, 1, "label_lenghts")
-    max_T = torch.max(lengths)
-    max_U = torch.max(label_lengths)
-    T, U = log_probs.shape[1:3]
-    if T != max_T:
-        raise ValueError(f"Input length mismatch! Given T: {T}, Expected max T from input lengths: {max_T}")
-    if U != max_U + 1:
-        raise ValueError(f"Output length mismatch! Given U: {U}, Expected max U from target lengths: {max_U} + 1")
+
+
+def certify_inputs(log_probs, labels, lengths, label_lengths):
+    # Well-formed inputs pass a single chain of cheap attribute reads; only a
+    # failing chain goes through the individual checks to find what to report
+    if not (
+        labels.dtype == torch.int64
+        and label_lengths.dtype == torch.int64
+        and lengths.dtype == torch.int64
+        and log_probs.dim() == 4
+        and labels.dim() == 2
+        and lengths.dim() == 1
+        and label_lengths.dim() == 1
+        and lengths.shape[0] == log_probs.shape[0]
+        and label_lengths.shape[0] == log_probs.shape[0]
+        and log_probs.is_contiguous()
+        and labels.is_contiguous()
+        and label_lengths.is_contiguous()
+        and lengths.is_contiguous()
+    ):
+        _slow_certify(log_probs, labels, lengths, label_lengths)
+
+    # The max-length check needs a device sync, so it is skipped under `python -O` and while a CUDA
+    # graph is captured; both reductions are copied to the host together to keep it to a single sync
+    if __debug__ and not (log_probs.is_cuda and torch.cuda.is_current_stream_capturing()):
+        max_T, max_U = torch.stack([lengths.max(), label_lengths.max()]).tolist()
+        T, U = log_probs.shape[1:3]
+        if T != max_T:
+            raise ValueError(f"Input length mismatch! Given T: {T}, Expected max T from input lengths: {max_T}")
+        if U != max_U + 1:
+            raise ValueError(f"Output length mismatch! Given U: {U}, Expected max U from target lengths: {max_U} + 1")
@@ -26,11 +26,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
 import math
 import multiprocessing
 from typing import Optional
 
 import numba
+import numpy as np
 import torch
 from torch.autograd import Function
 
@@ -161,6 +163,282 @@ class LogSoftmaxGradModification(Function):
         )
 
 
+@numba.njit(parallel=True)
+def _log_softmax_rows(acts, log_probs):
+    """
+    Row-wise log softmax over the last dim of a 2D array [rows, V], written into `log_probs`.
+    Each row is swept three times: once for the max, once for the sum-exp and once to write the result.
+    """
+    for r in numba.prange(acts.shape[0]):
+        row = acts[r]
+        row_max = row[0]
+        for v in range(1, row.shape[0]):
+            if row[v] > row_max:
+                row_max = row[v]
+
+        sum_exp = 0.0
+        for v in range(row.shape[0]):
+            sum_exp += math.exp(row[v] - row_max)
+        log_denom = row_max + math.log(sum_exp)
+
+        for v in range(row.shape[0]):
+            log_probs[r, v] = row[v] - log_denom
+
+
+@numba.njit(parallel=True)
+def _log_softmax_clamp_grad_rows(grad_output, log_probs, clamp, grad_input):
+    """
+    Row-wise gradient of log softmax (grad - softmax * sum(grad)), clamped to [-clamp, clamp] when clamp > 0.
+    """
+    for r in numba.prange(grad_output.shape[0]):
+        grad_sum = 0.0
+        for v in range(grad_output.shape[1]):
+            grad_sum += grad_output[r, v]
+
+        for v in range(grad_output.shape[1]):
+            g = grad_output[r, v] - math.exp(log_probs[r, v]) * grad_sum
+            if clamp > 0.0:
+                g = min(max(g, -clamp), clamp)
+            grad_input[r, v] = g
+
+
+@contextlib.contextmanager
+def _numba_threads_from_torch():
+    """
+    Runs Numba's parallel loops on as many threads as PyTorch's intra-op pool, and restores Numba's
+    previous thread count on exit so the setting does not leak to other Numba code in the process.
+    """
+    previous = numba.get_num_threads()
+    numba.set_num_threads(min(torch.get_num_threads(), numba.config.NUMBA_NUM_THREADS))
+    try:
+        yield
+    finally:
+        numba.set_num_threads(previous)
+
+
+class LogSoftmaxClampGrad(Function):
+    """
+    Fused equivalent of `log_softmax(LogSoftmaxGradModification.apply(acts, clamp), -1)` for CPU tensors.
+
+    The forward pass does not copy the joint tensor before the log softmax, and the backward pass
+    computes the log softmax gradient and clamps it in the same sweep over the last dim.
+    """
+
+    @staticmethod
+    def forward(ctx, acts, clamp):
+        if clamp < 0:
+            raise ValueError("`clamp` must be 0.0 or positive float.")
+
+        acts = acts.detach().contiguous()
+        log_probs = torch.empty_like(acts)
+        with _numba_threads_from_torch():
+            _log_softmax_rows(acts.view(-1, acts.shape[-1]).numpy(), log_probs.view(-1, acts.shape[-1]).numpy())
+
+        ctx.clamp = clamp
+        ctx.save_for_backward(log_probs)
+        return log_probs
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        (log_probs,) = ctx.saved_tensors
+        grad_output = grad_output.contiguous()
+        grad_input = torch.empty_like(log_probs)
+        with _numba_threads_from_torch():
+            _log_softmax_clamp_grad_rows(
+                grad_output.view(-1, log_probs.shape[-1]).numpy(),
+                log_probs.view(-1, log_probs.shape[-1]).numpy(),
+                ctx.clamp,
+                grad_input.view(-1, log_probs.shape[-1]).numpy(),
+            )
+        return (
+            grad_input,
+            None,
+        )
+
+
+def log_softmax_clamp_grad(acts: torch.Tensor, clamp: float) -> torch.Tensor:
+    """
+    Computes the log softmax of CPU activations over the last dim, clamping the gradient of
+    loss(log_softmax(acts)) with respect to acts to [-clamp, clamp] when clamp > 0.
+
+    Args:
+        acts: Activation tensor of shape [B, T, U, V+1] on the CPU.
+        clamp: Float value. When set to value > 0.0, will clamp the gradient to [-clamp, clamp].
+
+    Returns:
+        Log probabilities of the same shape as acts.
+    """
+    if acts.dtype in (torch.float32, torch.float64):
+        return LogSoftmaxClampGrad.apply(acts, clamp)
+
+    # Numba has no CPU kernels for reduced precision dtypes, fall back to the unfused ops.
+    if clamp > 0.0:
+        acts = LogSoftmaxGradModification.apply(acts, clamp)
+    return torch.nn.functional.log_softmax(acts, -1)
+
+
+@numba.njit
+def _log_add(a, b):
+    if a == -math.inf:
+        return b
+    if b == -math.inf:
+        return a
+    if a > b:
+        return math.log1p(math.exp(b - a)) + a
+    return math.log1p(math.exp(a - b)) + b
+
+
+@numba.njit(parallel=True)
+def _fused_rnnt_cost_and_grad(
+    acts, labels, act_lens, label_lens, blank, fastemit_lambda, grad_scale, costs, grads, compute_grads
+):
+    """
+    RNNT costs, and optionally gradients, computed straight from the unnormalized acts [B, T, U, V].
+
+    The log softmax denominators of the valid (t, u) cells are computed in the same pass that gathers the
+    blank and label log probs, so the normalized joint is never materialized. Gradients are written with
+    respect to acts, i.e. already taken through the log softmax, and scaled by grad_scale.
+    """
+    maxT, maxU, V = acts.shape[1], acts.shape[2], acts.shape[3]
+    for b in numba.prange(acts.shape[0]):
+        T = act_lens[b]
+        U = label_lens[b] + 1
+
+        log_denom = np.empty((T, U))
+        blank_lp = np.empty((T, U))
+        label_lp = np.zeros((T, U))
+        for t in range(T):
+            for u in range(U):
+                row = acts[b, t, u]
+                row_max = row[0]
+                for v in range(1, V):
+                    if row[v] > row_max:
+                        row_max = row[v]
+                sum_exp = 0.0
+                for v in range(V):
+                    sum_exp += math.exp(row[v] - row_max)
+                log_denom[t, u] = row_max + math.log(sum_exp)
+
+                blank_lp[t, u] = row[blank] - log_denom[t, u]
+                if u < U - 1:
+                    label_lp[t, u] = row[labels[b, u]] - log_denom[t, u]
+
+        alphas = np.empty((T, U))
+        alphas[0, 0] = 0.0
+        for t in range(T):
+            for u in range(U):
+                if u == 0 and t > 0:
+                    alphas[t, 0] = alphas[t - 1, 0] + blank_lp[t - 1, 0]
+                elif t == 0 and u > 0:
+                    alphas[0, u] = alphas[0, u - 1] + label_lp[0, u - 1]
+                elif t > 0 and u > 0:
+                    no_emit = alphas[t - 1, u] + blank_lp[t - 1, u]
+                    emit = alphas[t, u - 1] + label_lp[t, u - 1]
+                    alphas[t, u] = _log_add(emit, no_emit)
+
+        loglike = alphas[T - 1, U - 1] + blank_lp[T - 1, U - 1]
+        if not compute_grads:
+            # Matches CPURNNT.score_forward, which reports the plain negative log likelihood
+            costs[b] = -loglike
+            continue
+
+        costs[b] = -loglike * (1.0 + fastemit_lambda)
+
+        betas = np.empty((T, U))
+        betas[T - 1, U - 1] = blank_lp[T - 1, U - 1]
+        for t in range(T - 1, -1, -1):
+            for u in range(U - 1, -1, -1):
+                if u == U - 1 and t < T - 1:
+                    betas[t, U - 1] = betas[t + 1, U - 1] + blank_lp[t, U - 1]
+                elif t == T - 1 and u < U - 1:
+                    betas[T - 1, u] = betas[T - 1, u + 1] + label_lp[T - 1, u]
+                elif t < T - 1 and u < U - 1:
+                    no_emit = betas[t + 1, u] + blank_lp[t, u]
+                    emit = betas[t, u + 1] + label_lp[t, u]
+                    betas[t, u] = _log_add(emit, no_emit)
+        loglike = betas[0, 0]
+
+        for t in range(maxT):
+            for u in range(maxU):
+                if t >= T or u >= U:
+                    for v in range(V):
+                        grads[b, t, u, v] = 0.0
+                    continue
+
+                # Gradients w.r.t. the blank and label log probs of this cell
+                blank_grad = 0.0
+                if t < T - 1:
+                    blank_grad = -math.exp(blank_lp[t, u] + alphas[t, u] + betas[t + 1, u] - loglike)
+                elif u == U - 1:
+                    blank_grad = -math.exp(blank_lp[t, u] + alphas[t, u] - loglike)
+                label = -1
+                label_grad = 0.0
+                if u < U - 1:
+                    label = labels[b, u]
+                    label_grad = -math.exp(
+                        math.log1p(fastemit_lambda) + label_lp[t, u] + alphas[t, u] + betas[t, u + 1] - loglike
+                    )
+
+                # Backward through the log softmax: grad - softmax * sum(grad)
+                grad_sum = blank_grad + label_grad
+                for v in range(V):
+                    g = -math.exp(acts[b, t, u, v] - log_denom[t, u]) * grad_sum
+                    if v == blank:
+                        g += blank_grad
+                    elif v == label:
+                        g += label_grad
+                    grads[b, t, u, v] = g * grad_scale
+
+
+def fused_rnnt_loss_cpu(
+    acts: torch.Tensor,
+    labels: torch.Tensor,
+    input_lengths: torch.Tensor,
+    label_lengths: torch.Tensor,
+    costs: torch.Tensor,
+    grads: Optional[torch.Tensor],
+    blank_label: int,
+    fastemit_lambda: float,
+    grad_scale: float = 1.0,
+):
+    """
+    Computes the RNNT loss of CPU activations without a separate log softmax pass over the joint tensor.
+
+    Meant for small inputs, where the cost of materializing and saving the log softmax dominates the lattice
+    computation. Gradient clamping is not supported, since the clamp applies after scaling by the incoming
+    gradient, which is not known in forward.
+
+    Args:
+        acts: Unnormalized contiguous activation tensor of shape [B, T, U, V+1] on the CPU, fp32 or fp64.
+        labels: Ground truth labels of shape [B, U].
+        input_lengths: Lengths of the acoustic sequence as a vector of ints [B].
+        label_lengths: Lengths of the target sequence as a vector of ints [B].
+        costs: Vector of length [B] in which costs will be set.
+        grads: Tensor of the same shape as acts where the gradient w.r.t. acts will be set, or None for
+            a forward-only call. Need not be initialized.
+        blank_label: Index of the blank token in the vocabulary.
+        fastemit_lambda: Float scaling factor for FastEmit regularization.
+        grad_scale: Float factor applied to the gradients as they are written.
+    """
+    compute_grads = grads is not None
+    if not compute_grads:
+        grads = acts.new_empty((0, 0, 0, 0))
+
+    with _numba_threads_from_torch():
+        _fused_rnnt_cost_and_grad(
+            acts.detach().numpy(),
+            labels.numpy(),
+            input_lengths.numpy(),
+            label_lengths.numpy(),
+            blank_label,
+            fastemit_lambda,
+            grad_scale,
+            costs.numpy(),
+            grads.numpy(),
+            compute_grads,
+        )
+
+
 class CPURNNT:
     def __init__(
         self,
@@ -205,7 +483,8 @@ class CPURNNT:
 
         _torch_num_threads = torch.get_num_threads()
         if num_threads > 0:
-            numba.set_num_threads(min(multiprocessing.cpu_count(), num_threads))
+            # cpu_count() ignores CPU affinity, while Numba's pool is sized to the threads actually available
+            numba.set_num_threads(min(multiprocessing.cpu_count(), num_threads, numba.config.NUMBA_NUM_THREADS))
             self.num_threads_ = numba.get_num_threads()
         else:
             self.num_threads_ = numba.get_num_threads()
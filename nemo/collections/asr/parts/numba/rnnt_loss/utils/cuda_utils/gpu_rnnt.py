@@ -38,6 +38,11 @@ from nemo.collections.asr.parts.numba.rnnt_loss.utils import global_constants, r
 from nemo.collections.asr.parts.numba.rnnt_loss.utils.cuda_utils import gpu_rnnt_kernel, reduce
 
 
+def _stream_is_capturing() -> bool:
+    """True while a CUDA graph is being captured on the current stream, where host synchronization is not allowed."""
+    return torch.cuda.is_available() and torch.cuda.is_current_stream_capturing()
+
+
 class GPURNNT:
     def __init__(
         self,
@@ -51,6 +56,7 @@ class GPURNNT:
         clamp: float,
         num_threads: int,
         stream,
+        grad_scale: float = 1.0,
     ):
         """
         Helper class to launch the CUDA Kernels to compute the Transducer Loss.
@@ -68,6 +74,8 @@ class GPURNNT:
             clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
             num_threads: Number of OMP threads to launch.
             stream: Numba Cuda Stream.
+            grad_scale: Float factor applied to the gradients inside the gradient kernel, e.g. 1 / B
+                for a mean reduction, which saves a separate pass over the gradient tensor.
         """
         self.minibatch_ = minibatch
         self.maxT_ = maxT
@@ -79,18 +87,20 @@ class GPURNNT:
         self.blank_ = blank
         self.fastemit_lambda_ = fastemit_lambda
         self.clamp_ = abs(clamp)
+        self.grad_scale_ = grad_scale
         self.num_threads_ = num_threads
         self.stream_ = stream  # type: cuda.cudadrv.driver.Stream
 
         _torch_num_threads = torch.get_num_threads()
         if num_threads > 0:
-            numba.set_num_threads(min(multiprocessing.cpu_count(), num_threads))
+            # cpu_count() ignores CPU affinity, while Numba's pool is sized to the threads actually available
+            numba.set_num_threads(min(multiprocessing.cpu_count(), num_threads, numba.config.NUMBA_NUM_THREADS))
             self.num_threads_ = numba.get_num_threads()
         else:
             self.num_threads_ = numba.get_num_threads()
         torch.set_num_threads(_torch_num_threads)
 
-    def log_softmax(self, acts: torch.Tensor, denom: torch.Tensor):
+    def log_softmax(self, acts: torch.Tensor, denom: torch.Tensor, row_stride: Optional[int] = None):
         """
         Computes the log softmax denominator of the input activation tensor
         and stores the result in denom.
@@ -99,6 +109,8 @@ class GPURNNT:
             acts: Activation tensor of shape [B, T, U, V+1]. The input must be represented as a flat tensor
                 of shape [B * T * U * (V+1)] to allow pointer indexing.
             denom: A zero tensor of same shape as acts.
+            row_stride: Optional distance between the start of consecutive rows of acts, when acts is a
+                slice of a wider joint tensor. Defaults to the alphabet size.
 
         Updates:
             This kernel inplace updates the `denom` tensor
@@ -111,6 +123,7 @@ class GPURNNT:
             cols=self.minibatch_ * self.maxT_ * self.maxU_,
             minus=False,
             stream=self.stream_,
+            row_stride=row_stride,
         )
 
         reduce.reduce_exp(
@@ -120,6 +133,7 @@ class GPURNNT:
             cols=self.minibatch_ * self.maxT_ * self.maxU_,
             minus=True,
             stream=self.stream_,
+            row_stride=row_stride,
         )
 
     def compute_cost_and_score(
@@ -136,8 +150,10 @@ class GPURNNT:
 
         Args:
             acts: A flattened tensor of shape [B, T, U, V+1] representing the activation matrix.
-            grad: A flattented zero tensor of same shape as acts.
-            costs: A zero vector of length B which will be updated inplace with the log probability costs.
+            grad: A flattented tensor of same shape as acts. Need not be initialized, the gradient
+                kernel writes every element.
+            costs: A zero vector of length B which will be updated inplace with the log probability costs,
+                or a vector of length 1 which will be set to their sum.
             flat_labels: A flattened matrix of labels of shape [B, U]
             label_lengths: A vector of length B that contains the original lengths of the acoustic sequence.
             input_lengths: A vector of length B that contains the original lengths of the target sequence.
@@ -152,9 +168,6 @@ class GPURNNT:
         """
         training = grads is not None
 
-        if training:
-            grads *= 0.0  # zero grads
-
         used_offset, (denom, alphas, betas, llForward, llBackward) = self._prepare_workspace()
 
         ######## START EXECUTION ########
@@ -210,9 +223,11 @@ class GPURNNT:
                 self.maxT_,
                 self.maxU_,
                 self.alphabet_size_,
+                self.alphabet_size_,
                 self.blank_,
                 self.fastemit_lambda_,
                 self.clamp_,
+                self.grad_scale_,
             )
 
         # // cost copy, negate (for log likelihood) and update with additional regularizers
@@ -221,14 +236,26 @@ class GPURNNT:
         # But copying this data into a pytorch pointer is more difficult (numba api is one way)
         # Therefore launch a pointwise CUDA kernel to update the costs inplace from data of llForward
         # Then negate to compute the loglikelihood.
+        self._write_costs(llForward, costs)
+        if not _stream_is_capturing():
+            self.stream_.synchronize()
+
+        return global_constants.RNNTStatus.RNNT_STATUS_SUCCESS
+
+    def _write_costs(self, llForward: torch.Tensor, costs: torch.Tensor):
+        """
+        Writes the negated log likelihoods in llForward into costs, either one per example, or, when costs
+        holds a single element for a batch of several, their sum.
+        """
+        if costs.shape[0] == 1 and self.minibatch_ > 1:
+            rnnt_helper.compute_costs_sum[1, 1, self.stream_, 0](llForward, costs, self.fastemit_lambda_)
+            return
+
         threadsperblock = min(costs.shape[0], 32)
         blockspergrid = (costs.shape[0] + (threadsperblock - 1)) // threadsperblock
         rnnt_helper.compute_costs_data[blockspergrid, threadsperblock, self.stream_, 0](
             llForward, costs, self.fastemit_lambda_
         )
-        self.stream_.synchronize()
-
-        return global_constants.RNNTStatus.RNNT_STATUS_SUCCESS
 
     def cost_and_grad(
         self,
@@ -309,6 +336,7 @@ class MultiblankGPURNNT(GPURNNT):
         clamp: float,
         num_threads: int,
         stream,
+        grad_scale: float = 1.0,
     ):
         """
         Helper class to launch the CUDA Kernels to compute Multi-blank Transducer Loss (https://arxiv.org/pdf/2211.03541).
@@ -330,9 +358,21 @@ class MultiblankGPURNNT(GPURNNT):
             clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
             num_threads: Number of OMP threads to launch.
             stream: Numba Cuda Stream.
+            grad_scale: Float factor applied to the gradients inside the gradient kernel, e.g. 1 / B
+                for a mean reduction, which saves a separate pass over the gradient tensor.
         """
         super().__init__(
-            minibatch, maxT, maxU, alphabet_size, workspace, blank, fastemit_lambda, clamp, num_threads, stream
+            minibatch,
+            maxT,
+            maxU,
+            alphabet_size,
+            workspace,
+            blank,
+            fastemit_lambda,
+            clamp,
+            num_threads,
+            stream,
+            grad_scale=grad_scale,
         )
         self.big_blank_workspace = cuda.as_cuda_array(
             big_blank_workspace
@@ -355,8 +395,10 @@ class MultiblankGPURNNT(GPURNNT):
 
         Args:
             acts: A flattened tensor of shape [B, T, U, V+1] representing the activation matrix.
-            grad: A flattented zero tensor of same shape as acts.
-            costs: A zero vector of length B which will be updated inplace with the log probability costs.
+            grad: A flattented tensor of same shape as acts. Need not be initialized, the gradient
+                kernel writes every element.
+            costs: A zero vector of length B which will be updated inplace with the log probability costs,
+                or a vector of length 1 which will be set to their sum.
             flat_labels: A flattened matrix of labels of shape [B, U]
             label_lengths: A vector of length B that contains the original lengths of the acoustic sequence.
             input_lengths: A vector of length B that contains the original lengths of the target sequence.
@@ -371,9 +413,6 @@ class MultiblankGPURNNT(GPURNNT):
         """
         training = grads is not None
 
-        if training:
-            grads *= 0.0  # zero grads
-
         _, (denom, alphas, betas, llForward, llBackward, bigblank_durations) = self._prepare_workspace()
 
         ######## START EXECUTION ########
@@ -443,6 +482,7 @@ class MultiblankGPURNNT(GPURNNT):
                 self.num_big_blanks,
                 self.fastemit_lambda_,
                 self.clamp_,
+                self.grad_scale_,
             )
 
         # // cost copy, negate (for log likelihood) and update with additional regularizers
@@ -451,12 +491,9 @@ class MultiblankGPURNNT(GPURNNT):
         # But copying this data into a pytorch pointer is more difficult (numba api is one way)
         # Therefore launch a pointwise CUDA kernel to update the costs inplace from data of llForward
         # Then negate to compute the loglikelihood.
-        threadsperblock = min(costs.shape[0], 32)
-        blockspergrid = (costs.shape[0] + (threadsperblock - 1)) // threadsperblock
-        rnnt_helper.compute_costs_data[blockspergrid, threadsperblock, self.stream_, 0](
-            llForward, costs, self.fastemit_lambda_
-        )
-        self.stream_.synchronize()
+        self._write_costs(llForward, costs)
+        if not _stream_is_capturing():
+            self.stream_.synchronize()
 
         return global_constants.RNNTStatus.RNNT_STATUS_SUCCESS
 
@@ -526,6 +563,8 @@ class GPUTDT(GPURNNT):
         clamp: float,
         num_threads: int,
         stream,
+        acts_stride: Optional[int] = None,
+        grad_scale: float = 1.0,
     ):
         """
         Helper class to launch the CUDA Kernels to compute TDT Loss (https://arxiv.org/pdf/2211.03541).
@@ -548,15 +587,31 @@ class GPUTDT(GPURNNT):
             clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
             num_threads: Number of OMP threads to launch.
             stream: Numba Cuda Stream.
+            acts_stride: Optional distance between the start of consecutive rows of the label activations.
+                Set when label_acts is a strided view into the joint [B, T, U, V + D] tensor, so that it
+                does not need to be copied into a contiguous buffer. Defaults to alphabet_size.
+            grad_scale: Float factor applied to the gradients inside the gradient kernel, e.g. 1 / B
+                for a mean reduction, which saves a separate pass over the gradient tensor.
         """
         super().__init__(
-            minibatch, maxT, maxU, alphabet_size, workspace, blank, fastemit_lambda, clamp, num_threads, stream
+            minibatch,
+            maxT,
+            maxU,
+            alphabet_size,
+            workspace,
+            blank,
+            fastemit_lambda,
+            clamp,
+            num_threads,
+            stream,
+            grad_scale=grad_scale,
         )
         self.tdt_workspace = cuda.as_cuda_array(
             tdt_workspace
         )  # a flat vector of integer numbers that represents allocated memory slices
 
         self.num_durations = num_durations
+        self.acts_stride_ = acts_stride if acts_stride is not None else alphabet_size
         self.sigma = sigma
         self.omega = omega
 
@@ -577,9 +632,10 @@ class GPUTDT(GPURNNT):
         Args:
             label_acts: A flattened tensor of shape [B, T, U, V] representing the activation matrix for tokens.
             duration_acts: A flattened tensor of shape [B, T, U, D] representing the activation matrix for durations.
-            label_grad: A flattented zero tensor of same shape as label_acts.
-            duration_grad: A flattented zero tensor of same shape as duration_acts.
-            costs: A zero vector of length B which will be updated inplace with the log probability costs.
+            label_grad: A flattented tensor of same shape as label_acts. Need not be initialized.
+            duration_grad: A flattented tensor of same shape as duration_acts. Need not be initialized.
+            costs: A zero vector of length B which will be updated inplace with the log probability costs,
+                or a vector of length 1 which will be set to their sum.
             flat_labels: A flattened matrix of labels of shape [B, U]
             label_lengths: A vector of length B that contains the original lengths of the acoustic sequence.
             input_lengths: A vector of length B that contains the original lengths of the target sequence.
@@ -594,14 +650,10 @@ class GPUTDT(GPURNNT):
         """
         training = label_grads is not None
 
-        if training:
-            label_grads *= 0.0  # zero grads
-            duration_grads *= 0.0  # zero grads
-
         _, (denom, alphas, betas, llForward, llBackward, durations) = self._prepare_workspace()
 
         ######## START EXECUTION ########
-        self.log_softmax(label_acts, denom)
+        self.log_softmax(label_acts, denom, row_stride=self.acts_stride_)
 
         r = random.uniform(0, 1)
         if r < self.omega:
@@ -617,7 +669,7 @@ class GPUTDT(GPURNNT):
                 self.minibatch_,
                 self.maxT_,
                 self.maxU_,
-                self.alphabet_size_,
+                self.acts_stride_,  # only used as the row stride of label_acts
                 self.blank_,
             )
         else:
@@ -635,7 +687,7 @@ class GPUTDT(GPURNNT):
                 self.minibatch_,
                 self.maxT_,
                 self.maxU_,
-                self.alphabet_size_,
+                self.acts_stride_,  # only used as the row stride of label_acts
                 self.blank_,
                 durations,
                 self.num_durations,
@@ -655,7 +707,7 @@ class GPUTDT(GPURNNT):
                     self.minibatch_,
                     self.maxT_,
                     self.maxU_,
-                    self.alphabet_size_,
+                    self.acts_stride_,  # only used as the row stride of label_acts
                     self.blank_,
                 )
 
@@ -676,10 +728,15 @@ class GPUTDT(GPURNNT):
                     self.maxT_,
                     self.maxU_,
                     self.alphabet_size_,
+                    self.acts_stride_,
                     self.blank_,
                     self.fastemit_lambda_,
                     self.clamp_,
+                    self.grad_scale_,
                 )
+
+                # The standard RNNT gradient does not depend on the durations
+                duration_grads[:] = 0.0
             else:
                 gpu_rnnt_kernel.compute_tdt_betas_kernel[self.minibatch_, self.maxU_, self.stream_, 0](
                     label_acts,
@@ -694,7 +751,7 @@ class GPUTDT(GPURNNT):
                     self.minibatch_,
                     self.maxT_,
                     self.maxU_,
-                    self.alphabet_size_,
+                    self.acts_stride_,  # only used as the row stride of label_acts
                     self.blank_,
                     durations,
                     self.num_durations,
@@ -720,11 +777,13 @@ class GPUTDT(GPURNNT):
                     self.maxT_,
                     self.maxU_,
                     self.alphabet_size_,
+                    self.acts_stride_,
                     self.blank_,
                     durations,
                     self.num_durations,
                     self.fastemit_lambda_,
                     self.clamp_,
+                    self.grad_scale_,
                 )
 
         # // cost copy, negate (for log likelihood) and update with additional regularizers
@@ -733,12 +792,9 @@ class GPUTDT(GPURNNT):
         # But copying this data into a pytorch pointer is more difficult (numba api is one way)
         # Therefore launch a pointwise CUDA kernel to update the costs inplace from data of llForward
         # Then negate to compute the loglikelihood.
-        threadsperblock = min(costs.shape[0], 32)
-        blockspergrid = (costs.shape[0] + (threadsperblock - 1)) // threadsperblock
-        rnnt_helper.compute_costs_data[blockspergrid, threadsperblock, self.stream_, 0](
-            llForward, costs, self.fastemit_lambda_
-        )
-        self.stream_.synchronize()
+        self._write_costs(llForward, costs)
+        if not _stream_is_capturing():
+            self.stream_.synchronize()
 
         return global_constants.RNNTStatus.RNNT_STATUS_SUCCESS
 
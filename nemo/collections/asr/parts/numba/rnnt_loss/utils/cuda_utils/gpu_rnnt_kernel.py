@@ -284,9 +284,11 @@ def compute_grad_kernel(
     maxT: int,
     maxU: int,
     alphabet_size: int,
+    acts_stride: int,
     blank_: int,
     fastemit_lambda: float,
     clamp: float,
+    grad_scale: float,
 ):
     """
     Compute gradients over the transduction step.
@@ -311,10 +313,13 @@ def compute_grad_kernel(
         maxT: The maximum possible acoustic sequence length. Represents T in the logprobs tensor.
         maxU: The maximum possible target sequence length. Represents U in the logprobs tensor.
         alphabet_size: The vocabulary dimension V+1 (inclusive of RNNT blank).
+        acts_stride: Distance between the start of consecutive rows of acts. Equal to alphabet_size for a
+            contiguous activation tensor, larger when acts is a slice of a wider joint tensor.
         blank_: Index of the RNNT blank token in the vocabulary. Generally the first or last token in the vocab.
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
             FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
         clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
+        grad_scale: Float factor applied to every gradient before it is stored, e.g. 1 / B for a mean reduction.
 
     Updates:
         Kernel inplace updates the following inputs:
@@ -351,7 +356,7 @@ def compute_grad_kernel(
         while idx < alphabet_size:
             # remember, `col` represents the tri-index [b, t, u]
             # therefore; logpk = denom[b, t, u] + acts[b, t, u, v]
-            logpk = denom[col] + acts[col * alphabet_size + idx]
+            logpk = denom[col] + acts[col * acts_stride + idx]
             # initialize the grad of the sample acts[b, t, u, v]
             grad = math.exp(alphas[col] + betas[col] + logpk - logll[mb])
 
@@ -363,7 +368,7 @@ def compute_grad_kernel(
             if fastemit_lambda > 0.0 and u < U - 1:
                 fastemit_grad = fastemit_lambda * math.exp(
                     alphas[col]  # alphas(t, u)
-                    + (denom[col] + acts[col * alphabet_size + labels[u]])  # y_hat(t, u)
+                    + (denom[col] + acts[col * acts_stride + labels[u]])  # y_hat(t, u)
                     + betas[col + 1]  # betas(t, u+1)
                     + logpk  # log Pr(k|t, u)
                     - logll[mb]  # total log likelihood for normalization
@@ -392,19 +397,23 @@ def compute_grad_kernel(
                 # multiplying (1.0 + fastemit_lambda) with result.
                 grad -= math.exp(math.log1p(fastemit_lambda) + alphas[col] + logpk - logll[mb] + betas[col + 1])
 
-            # update grads[b, t, u, v] = grad
-            grads[col * alphabet_size + idx] = grad
-
             # clamp gradient (if needed)
             if clamp > 0.0:
-                g = grads[col * alphabet_size + idx]
-                g = min(g, clamp)
-                g = max(g, -clamp)
-                grads[col * alphabet_size + idx] = g
+                grad = min(grad, clamp)
+                grad = max(grad, -clamp)
+
+            # update grads[b, t, u, v] = grad, scaled in-register (e.g. by 1 / B for a mean reduction)
+            grads[col * alphabet_size + idx] = grad * grad_scale
 
             # update internal index through the thread_buffer;
             # until idx < V + 1, such that entire vocabulary has been updated.
             idx += GPU_RNNT_THREAD_SIZE
+    else:
+        # Padded cells (t >= T or u >= U) take no part in the loss. Zero them here so that every
+        # gradient is written by this kernel and the buffer can be allocated uninitialized.
+        while idx < alphabet_size:
+            grads[col * alphabet_size + idx] = 0.0
+            idx += GPU_RNNT_THREAD_SIZE
 
 
 @cuda.jit()
@@ -737,6 +746,7 @@ def compute_multiblank_grad_kernel(
     num_big_blanks: int,
     fastemit_lambda: float,
     clamp: float,
+    grad_scale: float,
 ):
     """
     Compute gradients for multi-blank transducer loss (https://arxiv.org/pdf/2211.03541).
@@ -766,6 +776,7 @@ def compute_multiblank_grad_kernel(
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
             FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
         clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
+        grad_scale: Float factor applied to every gradient before it is stored, e.g. 1 / B for a mean reduction.
         big_blank_durations: Vector of supported big blank durations of the model.
         num_big_blanks: Number of big blanks of the model.
 
@@ -870,19 +881,23 @@ def compute_multiblank_grad_kernel(
                     math.log1p(fastemit_lambda) + alphas[col] + logpk - sigma - logll[mb] + betas[col + 1]
                 )
 
-            # update grads[b, t, u, v] = grad
-            grads[col * alphabet_size + idx] = grad
-
             # clamp gradient (if needed)
             if clamp > 0.0:
-                g = grads[col * alphabet_size + idx]
-                g = min(g, clamp)
-                g = max(g, -clamp)
-                grads[col * alphabet_size + idx] = g
+                grad = min(grad, clamp)
+                grad = max(grad, -clamp)
+
+            # update grads[b, t, u, v] = grad, scaled in-register (e.g. by 1 / B for a mean reduction)
+            grads[col * alphabet_size + idx] = grad * grad_scale
 
             # update internal index through the thread_buffer;
             # until idx < V + 1, such that entire vocabulary has been updated.
             idx += GPU_RNNT_THREAD_SIZE
+    else:
+        # Padded cells (t >= T or u >= U) take no part in the loss. Zero them here so that every
+        # gradient is written by this kernel and the buffer can be allocated uninitialized.
+        while idx < alphabet_size:
+            grads[col * alphabet_size + idx] = 0.0
+            idx += GPU_RNNT_THREAD_SIZE
 
 
 @cuda.jit()
@@ -1259,11 +1274,13 @@ def compute_tdt_grad_kernel(
     maxT: int,
     maxU: int,
     alphabet_size: int,
+    acts_stride: int,
     blank_: int,
     durations: torch.Tensor,
     num_durations: int,
     fastemit_lambda: float,
     clamp: float,
+    grad_scale: float,
 ):
     """
     Compute gradients over the transduction step.
@@ -1290,10 +1307,13 @@ def compute_tdt_grad_kernel(
         maxT: The maximum possible acoustic sequence length. Represents T in the logprobs tensor.
         maxU: The maximum possible target sequence length. Represents U in the logprobs tensor.
         alphabet_size: The vocabulary dimension V+1 (inclusive of RNNT blank).
+        acts_stride: Distance between the start of consecutive rows of acts. Equal to alphabet_size for a
+            contiguous activation tensor, larger when acts is a slice of a wider joint tensor.
         blank_: Index of the RNNT blank token in the vocabulary. Generally the first or last token in the vocab.
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
             FastEmit: Low-latency Streaming ASR with Sequence-level Emission Regularization.
         clamp: Float value. When set to value >= 0.0, will clamp the gradient to [-clamp, clamp].
+        grad_scale: Float factor applied to every gradient before it is stored, e.g. 1 / B for a mean reduction.
 
     Updates:
         Kernel inplace updates the following inputs:
@@ -1322,13 +1342,13 @@ def compute_tdt_grad_kernel(
 
     if t < T and u < U:
         logpk_blank = (
-            denom[col] + acts[col * alphabet_size + blank_] - sigma
+            denom[col] + acts[col * acts_stride + blank_] - sigma
         )  # whenever sigma is used, it is for logit under-normalization.
 
         if idx < num_durations:
             grad = 0.0
             if t + durations[idx] < T and u < U - 1:  # for label
-                logpk_label = denom[col] + acts[col * alphabet_size + labels[u]] - sigma
+                logpk_label = denom[col] + acts[col * acts_stride + labels[u]] - sigma
                 grad -= math.exp(alphas[col] + betas[col + 1 + durations[idx] * maxU] + logpk_label - logll[mb])
 
             if t + durations[idx] < T and durations[idx] > 0:  # for blank in the middle
@@ -1338,7 +1358,7 @@ def compute_tdt_grad_kernel(
                 grad -= math.exp(alphas[col] + logpk_blank - logll[mb])
 
             grad = grad * math.exp(duration_acts[col * num_durations + idx])
-            duration_grads[col * num_durations + idx] = grad
+            duration_grads[col * num_durations + idx] = grad * grad_scale
 
         # For cuda kernels, maximum number of threads per block is limited to some value.
         # However, it may be the case that vocabulary size is larger than this limit
@@ -1350,7 +1370,7 @@ def compute_tdt_grad_kernel(
         while idx < alphabet_size:
             # remember, `col` represents the tri-index [b, t, u]
             # therefore; logpk = denom[b, t, u] + acts[b, t, u, v]
-            logpk = denom[col] + acts[col * alphabet_size + idx]
+            logpk = denom[col] + acts[col * acts_stride + idx]
             # initialize the grad of the sample acts[b, t, u, v]
             grad = math.exp(alphas[col] + betas[col] + logpk - logll[mb])
 
@@ -1366,7 +1386,7 @@ def compute_tdt_grad_kernel(
                     if t + durations[i] < T:
                         fastemit_grad += fastemit_lambda * math.exp(
                             alphas[col]  # alphas(t, u)
-                            + (denom[col] + acts[col * alphabet_size + labels[u]])  # log prob of token emission
+                            + (denom[col] + acts[col * acts_stride + labels[u]])  # log prob of token emission
                             + duration_acts[col * num_durations + i]  # duration log-prob
                             + betas[col + 1 + durations[i] * maxU]  # betas(t, u+1)
                             + logpk  # log Pr(k|t, u)
@@ -1424,16 +1444,23 @@ def compute_tdt_grad_kernel(
                             + duration_acts[col * num_durations + i]
                         )
 
-            # update grads[b, t, u, v] = grad
-            label_grads[col * alphabet_size + idx] = grad
-
             # clamp gradient (if needed)
             if clamp > 0.0:
-                g = label_grads[col * alphabet_size + idx]
-                g = min(g, clamp)
-                g = max(g, -clamp)
-                label_grads[col * alphabet_size + idx] = g
+                grad = min(grad, clamp)
+                grad = max(grad, -clamp)
+
+            # update grads[b, t, u, v] = grad, scaled in-register (e.g. by 1 / B for a mean reduction)
+            label_grads[col * alphabet_size + idx] = grad * grad_scale
 
             # update internal index through the thread_buffer;
             # until idx < V + 1, such that entire vocabulary has been updated.
             idx += GPU_RNNT_THREAD_SIZE
+    else:
+        # Padded cells (t >= T or u >= U) take no part in the loss. Zero them here so that every
+        # gradient is written by this kernel and the buffer can be allocated uninitialized.
+        if idx < num_durations:
+            duration_grads[col * num_durations + idx] = 0.0
+
+        while idx < alphabet_size:
+            label_grads[col * alphabet_size + idx] = 0.0
+            idx += GPU_RNNT_THREAD_SIZE
@@ -28,6 +28,7 @@
 
 import enum
 import math
+from typing import Optional
 
 import torch
 from numba import cuda
@@ -119,7 +120,7 @@ def CTAReduce(tid: int, x, storage, count: int, R_opid: int):
 
 
 @cuda.jit()
-def _reduce_rows(I_opid: int, R_opid: int, acts, output, num_rows: int):
+def _reduce_rows(I_opid: int, R_opid: int, acts, output, num_rows: int, row_stride: int):
     """
     CUDA Warp reduction kernel which reduces via the R_Op.Maximum
 
@@ -141,6 +142,8 @@ def _reduce_rows(I_opid: int, R_opid: int, acts, output, num_rows: int):
         acts: Flatened activation matrix of shape [B * T * U * (V+1)].
         output: Flatened output matrix of shape [B * T * U * (V+1)]. Data will be overwritten.
         num_rows: Vocabulary size (including blank token) - V+1.
+        row_stride: Distance between the start of consecutive rows of acts. Equal to num_rows for a
+            contiguous activation matrix, larger when acts is a slice of a wider joint tensor.
     """
     tid = cuda.threadIdx.x
     idx = tid
@@ -153,7 +156,7 @@ def _reduce_rows(I_opid: int, R_opid: int, acts, output, num_rows: int):
 
     # // Each block works on a column
     if idx < num_rows:
-        curr = acts[col * num_rows + idx] - max
+        curr = acts[col * row_stride + idx] - max
         if I_opid == 0:
             curr = rnnt_helper.exponential(curr)
         else:
@@ -162,7 +165,7 @@ def _reduce_rows(I_opid: int, R_opid: int, acts, output, num_rows: int):
     idx += CTA_REDUCE_SIZE
 
     while idx < num_rows:
-        activation_ = acts[col * num_rows + idx] - max
+        activation_ = acts[col * row_stride + idx] - max
 
         if I_opid == 0 and R_opid == 0:
             curr = rnnt_helper.add(curr, rnnt_helper.exponential(activation_))
@@ -184,7 +187,7 @@ def _reduce_rows(I_opid: int, R_opid: int, acts, output, num_rows: int):
 
 
 @cuda.jit()
-def _reduce_minus(I_opid: int, R_opid: int, acts, output, num_rows: int):
+def _reduce_minus(I_opid: int, R_opid: int, acts, output, num_rows: int, row_stride: int):
     """
     CUDA Warp reduction kernel which reduces via the R_Op.Add
 
@@ -206,6 +209,8 @@ def _reduce_minus(I_opid: int, R_opid: int, acts, output, num_rows: int):
         acts: Flatened activation matrix of shape [B * T * U * (V+1)].
         output: Flatened output matrix of shape [B * T * U * (V+1)]. Data will be overwritten.
         num_rows: Vocabulary size (including blank token) - V+1.
+        row_stride: Distance between the start of consecutive rows of acts. Equal to num_rows for a
+            contiguous activation matrix, larger when acts is a slice of a wider joint tensor.
     """
     tid = cuda.threadIdx.x
     idx = tid
@@ -218,7 +223,7 @@ def _reduce_minus(I_opid: int, R_opid: int, acts, output, num_rows: int):
 
     # // Each block works on a column
     if idx < num_rows:
-        curr = acts[col * num_rows + idx] - max
+        curr = acts[col * row_stride + idx] - max
         if I_opid == 0:
             curr = rnnt_helper.exponential(curr)
         else:
@@ -227,7 +232,7 @@ def _reduce_minus(I_opid: int, R_opid: int, acts, output, num_rows: int):
     idx += CTA_REDUCE_SIZE
 
     while idx < num_rows:
-        activation_ = acts[col * num_rows + idx] - max
+        activation_ = acts[col * row_stride + idx] - max
 
         if I_opid == 0 and R_opid == 0:
             curr = rnnt_helper.add(curr, rnnt_helper.exponential(activation_))
@@ -257,6 +262,7 @@ def ReduceHelper(
     num_cols: int,
     minus: bool,
     stream,
+    row_stride: Optional[int] = None,
 ):
     """
     CUDA Warp reduction kernel helper which reduces via the R_Op.Add and writes
@@ -282,21 +288,26 @@ def ReduceHelper(
         minus: Bool flag whether to add or subtract as reduction.
             If minus is set; calls _reduce_minus, else calls _reduce_rows kernel.
         stream: CUDA Stream.
+        row_stride: Optional distance between the start of consecutive rows of acts.
+            Defaults to num_rows (contiguous rows).
     """
+    if row_stride is None:
+        row_stride = num_rows
+
     if minus:
         grid_size = num_cols
         # call kernel
-        _reduce_minus[grid_size, CTA_REDUCE_SIZE, stream, 0](I_opid, R_opid, acts, output, num_rows)
+        _reduce_minus[grid_size, CTA_REDUCE_SIZE, stream, 0](I_opid, R_opid, acts, output, num_rows, row_stride)
 
     else:
         grid_size = num_cols
         # call kernel
-        _reduce_rows[grid_size, CTA_REDUCE_SIZE, stream, 0](I_opid, R_opid, acts, output, num_rows)
+        _reduce_rows[grid_size, CTA_REDUCE_SIZE, stream, 0](I_opid, R_opid, acts, output, num_rows, row_stride)
 
     return True
 
 
-def reduce_exp(acts: torch.Tensor, denom, rows: int, cols: int, minus: bool, stream):
+def reduce_exp(acts: torch.Tensor, denom, rows: int, cols: int, minus: bool, stream, row_stride: Optional[int] = None):
     """
     Helper method to call the Warp Reduction Kernel to perform `exp` reduction.
 
@@ -316,6 +327,8 @@ def reduce_exp(acts: torch.Tensor, denom, rows: int, cols: int, minus: bool, str
         minus: Bool flag whether to add or subtract as reduction.
             If minus is set; calls _reduce_minus, else calls _reduce_rows kernel.
         stream: CUDA Stream.
+        row_stride: Optional distance between the start of consecutive rows of acts.
+            Defaults to rows (contiguous rows).
     """
     return ReduceHelper(
         I_opid=I_Op.EXPONENTIAL.value,
@@ -326,10 +339,11 @@ def reduce_exp(acts: torch.Tensor, denom, rows: int, cols: int, minus: bool, str
         num_cols=cols,
         minus=minus,
         stream=stream,
+        row_stride=row_stride,
     )
 
 
-def reduce_max(acts: torch.Tensor, denom, rows: int, cols: int, minus: bool, stream):
+def reduce_max(acts: torch.Tensor, denom, rows: int, cols: int, minus: bool, stream, row_stride: Optional[int] = None):
     """
     Helper method to call the Warp Reduction Kernel to perform `max` reduction.
 
@@ -349,6 +363,8 @@ def reduce_max(acts: torch.Tensor, denom, rows: int, cols: int, minus: bool, str
         minus: Bool flag whether to add or subtract as reduction.
             If minus is set; calls _reduce_minus, else calls _reduce_rows kernel.
         stream: CUDA Stream.
+        row_stride: Optional distance between the start of consecutive rows of acts.
+            Defaults to rows (contiguous rows).
     """
     return ReduceHelper(
         I_opid=I_Op.IDENTITY.value,
@@ -359,4 +375,5 @@ def reduce_max(acts: torch.Tensor, denom, rows: int, cols: int, minus: bool, str
         num_cols=cols,
         minus=minus,
         stream=stream,
+        row_stride=row_stride,
     )
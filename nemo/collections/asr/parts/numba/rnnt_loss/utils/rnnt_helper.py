@@ -116,6 +116,17 @@ def compute_costs_data(source: torch.Tensor, dest: torch.Tensor, fastemit_lambda
         dest[idx] *= numba.float32(1.0 + fastemit_lambda)
 
 
+@cuda.jit()
+def compute_costs_sum(source: torch.Tensor, dest: torch.Tensor, fastemit_lambda: float):
+    # A single thread adds up the per-example log likelihoods in order, so the sum is deterministic.
+    # There are only B of them, which is negligible next to the lattice kernels that produced them.
+    if cuda.grid(1) == 0:
+        total = 0.0
+        for idx in range(source.shape[0]):
+            total += source[idx]
+        dest[0] = -total * numba.float32(1.0 + fastemit_lambda)
+
+
 def get_workspace_size(
     maxT: int, maxU: int, minibatch: int, gpu: bool
 ) -> Tuple[Optional[int], global_constants.RNNTStatus]:
@@ -146,3 +157,27 @@ def flatten_tensor(x: torch.Tensor):
     original_shape = x.shape
     x = x.view([-1])
     return x, original_shape
+
+
+def flatten_strided_rows(x: torch.Tensor) -> Tuple[torch.Tensor, int]:
+    """
+    Views a [B, T, U, V] tensor whose rows are dense but spaced further apart than V
+    (such as a slice of the last dimension of a wider joint tensor) as a flat vector for pointer indexing.
+
+    Args:
+        x: Tensor of shape [B, T, U, V] with unit stride along V and evenly spaced rows.
+
+    Returns:
+        A tuple of the flat view (starting at the first element of x) and the distance between
+        the start of consecutive rows.
+    """
+    if x.is_contiguous():
+        return x.view([-1]), x.shape[-1]
+
+    row_stride = x.stride(2)
+    if x.stride() != (x.shape[1] * x.shape[2] * row_stride, x.shape[2] * row_stride, row_stride, 1):
+        raise ValueError("Tensor rows must be dense and evenly spaced to be flattened with a row stride")
+
+    num_rows = x.shape[0] * x.shape[1] * x.shape[2]
+    span = (num_rows - 1) * row_stride + x.shape[3]
+    return x.as_strided([span], [1]), row_stride
@@ -506,8 +506,153 @@ class TestRNNTLossPytorch:
 
         assert np.allclose(pt_grads1_p_2, np_grads1 + np_grads2, atol=1e-5)
 
+    @pytest.mark.unit
+    @pytest.mark.parametrize('device', DEVICES)
+    @pytest.mark.parametrize('align', [8, 16])
+    def test_case_small_random_align(self, device, align):
+        if device == 'cuda':
+            numba_utils.skip_numba_cuda_test_if_unsupported(__NUMBA_MINIMUM_VERSION__)
+
+        rng = np.random.RandomState(0)
+        acts = rng.randn(2, 4, 3, 5).astype(np.float32)
+        labels = [[1, 2], [3, 4]]
+
+        fn_pt = RNNTLossNumba(blank=0, reduction='sum', align=align)
+        pt_cost, pt_grads = wrap_and_call(fn_pt, acts, labels, device)
+
+        fn_np = RNNTLoss_Numpy()
+        np_cost, np_grads = wrap_and_call(fn_np, acts, labels, device)
+
+        assert pt_grads.shape == acts.shape
+        assert np.allclose(pt_cost, np_cost, rtol=1e-6), "small_random_align_test costs mismatch."
+        assert np.allclose(pt_grads, np_grads, rtol=1e-5, atol=1e-8), "small_random_align_test gradient mismatch."
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('device', DEVICES)
+    @pytest.mark.parametrize('reduction', ['sum', 'mean'])
+    def test_case_small_random_scaled_loss(self, device, reduction):
+        if device == 'cuda':
+            numba_utils.skip_numba_cuda_test_if_unsupported(__NUMBA_MINIMUM_VERSION__)
+
+        rng = np.random.RandomState(0)
+        acts = rng.randn(2, 4, 3, 5).astype(np.float32)
+        labels = [[1, 2], [3, 4]]
+
+        fn_pt = RNNTLossNumba(blank=0, reduction=reduction)
+        _, pt_grads = wrap_and_call(fn_pt, acts, labels, device)
+
+        # A scaled loss (e.g. AMP loss scaling) must still scale the gradients
+        _, pt_grads_scaled = wrap_and_call(lambda *args: 4.0 * fn_pt(*args), acts, labels, device)
+
+        assert np.allclose(4.0 * pt_grads, pt_grads_scaled, rtol=1e-6), "small_random_scaled_loss gradient mismatch."
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('device', DEVICES)
+    @pytest.mark.parametrize('reduction', ['sum', 'mean'])
+    def test_case_small_random_forward_only_reduction(self, device, reduction):
+        if device == 'cuda':
+            numba_utils.skip_numba_cuda_test_if_unsupported(__NUMBA_MINIMUM_VERSION__)
+
+        rng = np.random.RandomState(0)
+        acts = rng.randn(3, 4, 3, 5).astype(np.float32)
+        labels = [[1, 2], [3, 4], [2, 1]]
+
+        fn_pt = RNNTLossNumba(blank=0, reduction=reduction)
+        pt_cost, _ = wrap_and_call(fn_pt, acts, labels, device)
+
+        # Without gradients the CUDA kernels reduce the costs themselves
+        acts_t = torch.tensor(acts, device=device)
+        labels_t = torch.tensor(labels, device=device)
+        lengths = torch.tensor([acts.shape[1]] * acts.shape[0], device=device)
+        label_lengths = torch.tensor([len(label) for label in labels], device=device)
+        with torch.no_grad():
+            forward_only_cost = fn_pt(acts_t, labels_t, lengths, label_lengths)
+
+        assert forward_only_cost.shape == ()
+        assert np.allclose(forward_only_cost.cpu().numpy(), pt_cost, rtol=1e-6), (
+            "small_random_forward_only_reduction costs mismatch."
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('reduction', ['none', 'mean'])
+    @pytest.mark.parametrize('fastemit_lambda', [0.0, 0.01])
+    def test_case_small_random_fused_cpu(self, reduction, fastemit_lambda):
+        rng = np.random.RandomState(0)
+        acts = rng.randn(2, 4, 3, 5).astype(np.float32)
+        labels = [[1, 2], [3, 4]]
+
+        fn_fused = RNNTLossNumba(blank=0, reduction=reduction, fastemit_lambda=fastemit_lambda)
+        fused_cost, fused_grads = wrap_and_call(fn_fused, acts, labels, 'cpu')
+
+        # Force the separate log_softmax path
+        fn_pt = RNNTLossNumba(blank=0, reduction=reduction, fastemit_lambda=fastemit_lambda)
+        fn_pt.small_batch_numel = 0
+        pt_cost, pt_grads = wrap_and_call(fn_pt, acts, labels, 'cpu')
+
+        assert np.allclose(fused_cost, pt_cost, rtol=1e-6), "small_random_fused_cpu costs mismatch."
+        assert np.allclose(fused_grads, pt_grads, rtol=1e-5, atol=1e-7), "small_random_fused_cpu gradient mismatch."
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('fastemit_lambda', [0.0, 0.01])
+    def test_case_small_random_fused_cpu_forward_only(self, fastemit_lambda):
+        rng = np.random.RandomState(0)
+        acts = torch.tensor(rng.randn(2, 4, 3, 5).astype(np.float32))
+        labels = torch.tensor([[1, 2], [3, 4]])
+        act_lens = torch.tensor([4, 4])
+        label_lens = torch.tensor([2, 2])
+
+        fn_fused = RNNTLossNumba(blank=0, reduction='none', fastemit_lambda=fastemit_lambda)
+        fused_cost = fn_fused(acts, labels, act_lens, label_lens)
+
+        # Forward-only costs from the separate log_softmax path do not include the FastEmit factor
+        fn_pt = RNNTLossNumba(blank=0, reduction='none', fastemit_lambda=fastemit_lambda)
+        fn_pt.small_batch_numel = 0
+        pt_cost = fn_pt(acts, labels, act_lens, label_lens)
+
+        assert torch.allclose(fused_cost, pt_cost, rtol=1e-6), "small_random_fused_cpu_forward_only costs mismatch."
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('device', CUDA_ONLY_DEVICE)
+    def test_case_small_random_graph_capture(self, device):
+        numba_utils.skip_numba_cuda_test_if_unsupported(__NUMBA_MINIMUM_VERSION__)
+
+        rng = np.random.RandomState(0)
+        labels = torch.tensor([[1, 2], [3, 4]], device=device)
+        act_lens = torch.tensor([4, 4], device=device)
+        label_lens = torch.tensor([2, 2], device=device)
+
+        fn_pt = RNNTLossNumba(blank=0, reduction='none')
+        acts = torch.tensor(rng.randn(2, 4, 3, 5).astype(np.float32), device=device)
+        fn_pt.forward_graph_capture(acts, labels, act_lens, label_lens)
+
+        # Replays of the captured graph must match eager calls on new inputs of the same shape
+        for _ in range(2):
+            acts = torch.tensor(rng.randn(2, 4, 3, 5).astype(np.float32), device=device)
+            with torch.no_grad():
+                graph_cost = fn_pt(acts, labels, act_lens, label_lens)
+            eager_cost = RNNTLossNumba(blank=0, reduction='none')(acts, labels, act_lens, label_lens)
+
+            assert torch.allclose(graph_cost, eager_cost), "small_random_graph_capture costs mismatch."
+
+        # A graph captured with reduction='none' must not serve calls with another reduction
+        fn_pt.reduction = 'mean'
+        with torch.no_grad():
+            mean_cost = fn_pt(acts, labels, act_lens, label_lens)
+        eager_mean_cost = RNNTLossNumba(blank=0, reduction='mean')(acts, labels, act_lens, label_lens)
+        assert torch.allclose(mean_cost, eager_mean_cost), "small_random_graph_capture mean cost mismatch."
+
 
 class TestMultiblankRNNTLoss:
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        'big_blank_durations', [None, [2, 4, 8], (2, 4, 8), np.array([2, 4, 8]), torch.tensor([2, 4, 8])]
+    )
+    def test_big_blank_durations_types(self, big_blank_durations):
+        fn_pt = MultiblankRNNTLossNumba(blank=0, big_blank_durations=big_blank_durations)
+
+        expected = [] if big_blank_durations is None else [2, 4, 8]
+        assert fn_pt._big_blank_np.tolist() == expected
+
     @pytest.mark.unit
     @pytest.mark.parametrize('device', DEVICES)
     def test_case_randomized_act_label(self, device):
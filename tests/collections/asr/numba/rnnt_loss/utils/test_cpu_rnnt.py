@@ -0,0 +1,46 @@
+# Copyright (c) 2021, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.asr.parts.numba.rnnt_loss.utils.cpu_utils import cpu_rnnt
+
+DTYPES = [torch.float32, torch.float64]
+
+
+class TestCPURNNTLogSoftmax:
+    @pytest.mark.unit
+    @pytest.mark.parametrize('dtype', DTYPES)
+    @pytest.mark.parametrize('clamp', [0.0, 0.1])
+    def test_log_softmax_clamp_grad(self, dtype, clamp):
+        torch.manual_seed(0)
+        original_shape = [2, 5, 4, 7]
+        acts = torch.randn(*original_shape, dtype=dtype, requires_grad=True)
+        grad_output = torch.randn(*original_shape, dtype=dtype)
+        threshold = 1e-6 if dtype == torch.float32 else 1e-12
+
+        # fused op
+        log_probs = cpu_rnnt.log_softmax_clamp_grad(acts, clamp)
+        log_probs.backward(grad_output)
+        fused_grads = acts.grad.clone()
+        acts.grad = None
+
+        # reference, unfused ops
+        ref_acts = cpu_rnnt.LogSoftmaxGradModification.apply(acts, clamp) if clamp > 0.0 else acts
+        ref_log_probs = torch.nn.functional.log_softmax(ref_acts, -1)
+        ref_log_probs.backward(grad_output)
+
+        assert torch.allclose(log_probs, ref_log_probs, atol=threshold)
+        assert torch.allclose(fused_grads, acts.grad, atol=threshold)
@@ -283,9 +283,11 @@ class TestRNNTCUDAKernels:
             T,
             U,
             V,
+            V,
             blank_idx,
             fastemit_lambda,
             clamp,
+            1.0,
         )
 
         # sync kernel
@@ -395,9 +397,11 @@ class TestRNNTCUDAKernels:
             T,
             U,
             V,
+            V,
             blank_idx,
             fastemit_lambda,
             clamp,
+            1.0,
         )
 
         # sync kernel
@@ -507,9 +511,11 @@ class TestRNNTCUDAKernels:
             T,
             U,
             V,
+            V,
             blank_idx,
             fastemit_lambda,
             clamp,
+            1.0,
         )
 
         # sync kernel
@@ -0,0 +1,83 @@
+# Copyright (c) 2026, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import numpy as np
+import pytest
+
+# The script pulls in the ASR, NLP and HF stacks at import time
+mvnp = pytest.importorskip("medical_voice_note_processor")
+
+from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis  # noqa: E402
+
+
+class _StubASRModel:
+    """Mimics EncDecRNNTModel.transcribe, which returns a flat list with one Hypothesis per input."""
+
+    def transcribe(self, audio, batch_size):
+        return [Hypothesis(score=0.0, y_sequence=[], text=f"transcript {len(a)}") for a in audio]
+
+
+class TestMedicalVoiceNoteProcessor:
+    @pytest.mark.unit
+    def test_transcribe_returns_one_string_per_file(self, monkeypatch):
+        monkeypatch.setattr(mvnp, "get_asr_model", lambda: _StubASRModel())
+        monkeypatch.setattr(mvnp, "load_audio", lambda audio_file: np.zeros(int(audio_file), dtype=np.float32))
+
+        audio_files = ["16000", "8000", "4000"]
+        transcripts = mvnp.transcribe(audio_files, backend="nemo")
+
+        assert isinstance(transcripts, list)
+        assert len(transcripts) == len(audio_files)
+        assert transcripts == ["transcript 16000", "transcript 8000", "transcript 4000"]
+
+    @pytest.mark.unit
+    def test_load_audio_keeps_decoded_length(self, monkeypatch):
+        decoded = np.random.RandomState(0).randn(12345).astype(np.float32)
+        monkeypatch.setattr(mvnp.sf, "read", lambda *args, **kwargs: (decoded, mvnp.SAMPLE_RATE))
+        # Compiling the encoder must not change what the model is fed
+        monkeypatch.setattr(mvnp, "COMPILE_ASR_ENCODER", True)
+
+        audio = mvnp.load_audio("note.wav")
+
+        assert np.array_equal(audio, decoded)
+
+    @pytest.mark.unit
+    def test_process_files_stops_threads_when_caller_breaks(self, monkeypatch):
+        monkeypatch.setattr(mvnp, "transcribe", lambda files: [f"text {f}" for f in files])
+        monkeypatch.setattr(mvnp, "summarize_text", lambda texts: [f"summary {t}" for t in texts])
+        monkeypatch.setattr(mvnp, "translate_summary", lambda summaries: [f"translation {s}" for s in summaries])
+        threads_before = threading.active_count()
+
+        results = mvnp.process_files([f"{i}.wav" for i in range(100)], queue_size=1)
+        first = next(results)
+        results.close()
+
+        assert first == ("0.wav", "text 0.wav", "summary text 0.wav", "translation summary text 0.wav")
+        assert threading.active_count() == threads_before
+
+    @pytest.mark.unit
+    def test_process_files_raises_stage_error(self, monkeypatch):
+        def failing_summarize(texts):
+            raise RuntimeError("summarizer failed")
+
+        monkeypatch.setattr(mvnp, "transcribe", lambda files: [f"text {f}" for f in files])
+        monkeypatch.setattr(mvnp, "summarize_text", failing_summarize)
+        threads_before = threading.active_count()
+
+        with pytest.raises(RuntimeError, match="summarizer failed"):
+            list(mvnp.process_files([f"{i}.wav" for i in range(100)], queue_size=1))
+
+        assert threading.active_count() == threads_before
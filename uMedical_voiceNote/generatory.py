@@ -1,3 +1,5 @@
+import threading
+
 import numpy as np
 import sounddevice as sd
 import pyttsx3
@@ -7,18 +9,26 @@ import time
 def play_tone(frequency=18000, duration=2, amplitude_db=2):
     fs = 44100  # Sampling rate
     amplitude = 10 ** (amplitude_db / 20) * 0.01  # Convert dB to linear scale
-    t = np.linspace(0, duration, int(fs * duration), endpoint=False)
-    waveform = amplitude * np.sin(2 * np.pi * frequency * t)
+    # Build the float32 samples sounddevice plays in a single buffer, in place
+    waveform = np.arange(int(fs * duration), dtype=np.float32)
+    waveform *= np.float32(2 * np.pi * frequency / fs)
+    np.sin(waveform, out=waveform)
+    waveform *= np.float32(amplitude)
     sd.play(waveform, fs)
     sd.wait()
 
+# Speech engine is started once and reused; starting the TTS driver takes
+# hundreds of ms. pyttsx3 engines are not reentrant, so calls are serialized.
+_ENGINE = pyttsx3.init()
+_ENGINE.setProperty('rate', 150)      # Speaking rate
+_ENGINE.setProperty('volume', 1.0)    # Volume (0.0 to 1.0)
+_ENGINE_LOCK = threading.Lock()
+
 # Speak the given medical note
 def speak_text(text):
-    engine = pyttsx3.init()
-    engine.setProperty('rate', 150)      # Speaking rate
-    engine.setProperty('volume', 1.0)    # Volume (0.0 to 1.0)
-    engine.say(text)
-    engine.runAndWait()
+    with _ENGINE_LOCK:
+        _ENGINE.say(text)
+        _ENGINE.runAndWait()
 
 # Your message
 voice_to_speak = "The patient has been complaining of chest pain for the past week. ECG shows irregular rhythm. Prescribed low dose beta-blocker. Recommended follow-up in 5 days."